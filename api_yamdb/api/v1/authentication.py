@@ -0,0 +1,45 @@
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import CustomUser
+from users.tokens import get_auth_version
+
+# Поля пользователя, которые берутся из claims токена.
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                'auth_version')
+TOKEN_REVOKED_ERROR = 'Токен отозван, получите новый.'
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без чтения пользователя из базы.
+
+    Пользователь собирается из claims токена, выданного CreateToken;
+    остальные поля модели отложены и подгружаются только при обращении.
+    Токен действителен, пока его версия прав совпадает с текущей версией
+    пользователя (она кешируется на AUTH_VERSION_CACHE_TIMEOUT секунд).
+    Токены без claims проверяются обычным запросом в базу.
+    """
+
+    def get_user(self, validated_token):
+        if 'auth_version' not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_auth_version(user_id) != validated_token['auth_version']:
+            raise AuthenticationFailed(
+                TOKEN_REVOKED_ERROR, code='token_revoked'
+            )
+        claims = {claim: validated_token[claim] for claim in CLAIM_FIELDS}
+        claims.update(id=user_id, is_active=True)
+        # from_db ждёт значения в порядке полей модели.
+        field_names = [
+            field.attname for field in CustomUser._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return CustomUser.from_db(
+            router.db_for_read(CustomUser),
+            field_names,
+            [claims[name] for name in field_names],
+        )
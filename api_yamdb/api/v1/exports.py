@@ -0,0 +1,80 @@
+import csv
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from reviews.models import Comment, Review, Title
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'titles': {
+        'queryset': Title.objects.all(),
+        'fields': (
+            'id', 'name', 'year', 'description', 'category__slug',
+            'rating_sum', 'rating_count',
+        ),
+        'date_field': None,
+    },
+    'reviews': {
+        'queryset': Review.objects.all(),
+        'fields': (
+            'id', 'title_id', 'author__username', 'text', 'score', 'pub_date',
+        ),
+        'date_field': 'pub_date',
+    },
+    'comments': {
+        'queryset': Comment.objects.all(),
+        'fields': (
+            'id', 'review_id', 'review__title_id', 'author__username',
+            'text', 'pub_date',
+        ),
+        'date_field': 'pub_date',
+    },
+}
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: отдаёт строку вместо записи в файл."""
+
+    def write(self, value):
+        return value
+
+
+def parse_since(value):
+    """Дата или дата и время в формате ISO 8601; ValueError при ошибке."""
+    since = parse_datetime(value)
+    if since is None:
+        since_date = parse_date(value)
+        if since_date is None:
+            raise ValueError(value)
+        since = datetime.combine(since_date, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def export_rows(resource, since=None):
+    """Кортежи значений без создания экземпляров моделей."""
+    export = EXPORTS[resource]
+    queryset = export['queryset']
+    if since is not None:
+        queryset = queryset.filter(**{f'{export["date_field"]}__gte': since})
+    return queryset.order_by('pk').values_list(
+        *export['fields']
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_ndjson(fields, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def stream_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
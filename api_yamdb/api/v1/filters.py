@@ -1,22 +1,104 @@
+from django.db.models import Q
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
-from reviews.models import Title
+from reviews import genre_masks
+from reviews.catalog_cache import category_cache, genre_cache
+from reviews.models import TITLE_ORDERING, Title
+from reviews.search import contains_lookup, prefix_lookup, search_titles
+from users.models import CustomUser
+
+GENRE_MODES = (
+    (genre_masks.ALL, 'Все перечисленные жанры'),
+    (genre_masks.ANY, 'Хотя бы один из жанров'),
+)
+# Оба порядка обходят индексы Title по (year, id) в одну или другую
+# сторону; id делает порядок страниц однозначным.
+TITLE_ORDERINGS = {
+    '-year': TITLE_ORDERING,
+    'year': ('year', 'id'),
+}
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
-    )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='contains'
+    # ?genre=drama,comedy&genre_mode=all|any, по умолчанию all.
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=GENRE_MODES, method='filter_genre_mode'
     )
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='contains'
+    category = filters.CharFilter(method='filter_category')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in TITLE_ORDERINGS],
+        method='filter_ordering'
     )
+    name = filters.CharFilter(method='filter_name')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        # Только поля с индексами; счётчики и служебные колонки
+        # произведения фильтрами не становятся.
+        fields = ('year',)
+
+    def filter_genre(self, queryset, name, value):
+        slugs = {slug.strip() for slug in value.split(',')} - {''}
+        if not slugs:
+            return queryset
+        mode = self.form.cleaned_data.get('genre_mode') or genre_masks.ALL
+        genres = [genre_cache.get(slug) for slug in slugs]
+        if mode == genre_masks.ALL and None in genres:
+            return queryset.none()
+        return genre_masks.filter_titles(
+            queryset, [genre for genre in genres if genre is not None], mode
+        )
+
+    def filter_category(self, queryset, name, value):
+        # Сравнение category_id вместо соединения с таблицей категорий
+        # использует индекс title_category_idx.
+        category = category_cache.get(value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.pk)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*TITLE_ORDERINGS[value])
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим применяется в filter_genre.
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(**contains_lookup('name_search', value))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class UserFilter(filters.FilterSet):
+    # ?username_prefix= - начало имени, читается из индекса username_search.
+    username_prefix = filters.CharFilter(method='filter_username_prefix')
+
+    class Meta:
+        model = CustomUser
+        fields = ('username_prefix',)
+
+    def filter_username_prefix(self, queryset, name, value):
+        return queryset.filter(**prefix_lookup('username_search', value))
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """
+    ?search= по вхождению в нормализованные колонки
+    (reviews.search.SEARCH_COLUMNS).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        for term in self.get_search_terms(request) if search_fields else ():
+            condition = Q()
+            for field in search_fields:
+                condition |= Q(**contains_lookup(field, term))
+            queryset = queryset.filter(condition)
+        return queryset
@@ -0,0 +1,203 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.core.exceptions import EmptyResultSet
+from django.db.models import F, Func, Q
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_MAX_PAGE_SIZE = 100
+INVALID_CURSOR_ERROR = 'Неверный курсор.'
+
+
+class PubDateCursorPagination(BasePagination):
+    """
+    Постраничный вывод от новых к старым по составному ключу (pub_date, id)
+    с непрозрачным курсором.
+
+    Курсор хранит pub_date и id крайней записи страницы, следующая
+    страница выбирается условием pub_date < p OR (pub_date = p AND id < i)
+    без смещения. Поэтому сколько угодно записей с одинаковым pub_date
+    (например, загруженных из CSV одним пакетом) листаются так же, как
+    остальные. CursorPagination из DRF ключует только по первому полю
+    ordering и разрешает совпадения смещением, которое ограничено.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    max_page_size = CURSOR_MAX_PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+
+    def decode_cursor(self, request):
+        """(pub_date, id, назад ли) из ?cursor=, None - первая страница."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(
+                b64decode(encoded.encode('ascii')).decode('ascii'),
+                keep_blank_values=True, strict_parsing=True
+            )
+            pub_date = parse_datetime(tokens['p'][0])
+            pk = int(tokens['i'][0])
+            reverse = tokens.get('r', ['0'])[0] == '1'
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(INVALID_CURSOR_ERROR)
+        if pub_date is None:
+            raise NotFound(INVALID_CURSOR_ERROR)
+        return pub_date, pk, reverse
+
+    def encode_cursor(self, obj, reverse):
+        tokens = {'p': obj.pub_date.isoformat(), 'i': obj.pk}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(
+            parse.urlencode(tokens, doseq=True).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if cursor is not None:
+            pub_date, pk = cursor[:2]
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, id__lt=pk)
+                )
+        results = list(queryset[:page_size + 1])
+        has_following = len(results) > page_size
+        self.page = results[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class PageKeysPagination(LimitOffsetPagination):
+    """
+    limit/offset, который может заранее, одним запросом, выбрать pk
+    записей страницы вместе с общим числом записей. Это число затем
+    отдаётся вместо отдельного COUNT при выводе страницы.
+    """
+
+    def __init__(self):
+        self.known_count = None
+
+    def page_keys(self, queryset, request):
+        keys = queryset.values_list('pk', flat=True)
+        limit = self.get_limit(request)
+        if limit is None:
+            return list(keys)
+        offset = self.get_offset(request)
+        # Несвязанный подзапрос SQLite вычисляет один раз, а страница
+        # по-прежнему читается по индексу без сортировки. Он собирается
+        # отдельно: условия через extra ссылаются на таблицу по имени.
+        try:
+            count_sql, count_params = queryset.order_by().values(
+                total=Func(F('pk'), function='COUNT')
+            ).query.sql_with_params()
+        except EmptyResultSet:
+            return []
+        rows = list(queryset.annotate(
+            total=RawSQL(count_sql, count_params)
+        ).values_list('pk', 'total')[offset:offset + limit])
+        # Пустая страница числа записей не сообщает, его посчитают заново.
+        self.known_count = rows[0][1] if rows else None
+        return [key for key, _ in rows]
+
+    def get_count(self, queryset):
+        count, self.known_count = self.known_count, None
+        if count is None:
+            return super().get_count(queryset)
+        return count
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    По умолчанию limit/offset, курсорный режим включается параметром
+    ?pagination=cursor или переданным ?cursor=.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.limit_offset = LimitOffsetPagination()
+        self.cursor = PubDateCursorPagination()
+        self.paginator = self.limit_offset
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor
+        else:
+            self.paginator = self.limit_offset
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
@@ -0,0 +1,125 @@
+import hashlib
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from reviews import stamps
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+# Сколько секунд после истечения можно отдавать устаревший ответ тем,
+# кто не получил право на пересчёт. 0 - не отдавать, а ждать.
+RESPONSE_CACHE_STALE_WHILE_REVALIDATE = getattr(
+    settings, 'RESPONSE_CACHE_STALE_WHILE_REVALIDATE', 0
+)
+# Коэффициент вероятностного досрочного истечения (XFetch). 0 - выключено.
+RESPONSE_CACHE_EARLY_EXPIRATION_BETA = getattr(
+    settings, 'RESPONSE_CACHE_EARLY_EXPIRATION_BETA', 1.0
+)
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(
+    settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 10
+)
+RESPONSE_CACHE_WAIT = getattr(settings, 'RESPONSE_CACHE_WAIT', 2.0)
+RESPONSE_CACHE_POLL_INTERVAL = getattr(
+    settings, 'RESPONSE_CACHE_POLL_INTERVAL', 0.02
+)
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def make_key(request):
+    """Ключ по хосту, пути, отсортированным параметрам и формату."""
+    params = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    raw = (
+        f'{request.get_host()}{request.path}?{params}'
+        f'|{request.accepted_renderer.format}'
+    )
+    return 'response:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def read_tokens(names):
+    return {
+        name: token
+        for name, (token, _) in zip(names, stamps.get_stamps(names))
+    }
+
+
+def expires_early(entry):
+    """XFetch: чем дороже пересчёт, тем раньше запись считается истёкшей."""
+    if not RESPONSE_CACHE_EARLY_EXPIRATION_BETA:
+        return False
+    gap = -entry['delta'] * RESPONSE_CACHE_EARLY_EXPIRATION_BETA * math.log(
+        1.0 - random.random()
+    )
+    return time.time() + gap >= entry['expires_at']
+
+
+def is_fresh(entry):
+    return (
+        time.time() < entry['expires_at']
+        and not expires_early(entry)
+        and read_tokens(list(entry['stamps'])) == entry['stamps']
+    )
+
+
+def is_servable_stale(entry):
+    return (
+        RESPONSE_CACHE_STALE_WHILE_REVALIDATE > 0
+        and time.time()
+        < entry['expires_at'] + RESPONSE_CACHE_STALE_WHILE_REVALIDATE
+    )
+
+
+def store(key, tokens, data, delta):
+    response_cache().set(
+        key,
+        {
+            'stamps': tokens,
+            'data': data,
+            'delta': delta,
+            'expires_at': time.time() + RESPONSE_CACHE_TIMEOUT,
+        },
+        RESPONSE_CACHE_TIMEOUT + RESPONSE_CACHE_STALE_WHILE_REVALIDATE,
+    )
+
+
+def single_flight(key, compute):
+    """
+    Отдаёт свежую запись или пересчитывает её. Пересчитывает только тот,
+    кто первым взял блокировку; остальные получают устаревший ответ
+    (если это разрешено) или ждут свежий. Если за RESPONSE_CACHE_WAIT
+    секунд запись не появилась, пересчитывают сами.
+    """
+    cache = response_cache()
+    entry = cache.get(key)
+    if entry is not None and is_fresh(entry):
+        return Response(entry['data'])
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, True, RESPONSE_CACHE_LOCK_TIMEOUT):
+        try:
+            return compute()
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None and is_servable_stale(entry):
+        return Response(entry['data'])
+    deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+        fresh = cache.get(key)
+        if fresh is not None and is_fresh(fresh):
+            return Response(fresh['data'])
+        if cache.get(lock_key) is None:
+            break
+    return compute()
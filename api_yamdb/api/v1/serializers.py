@@ -1,8 +1,9 @@
-from django.core.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
+from reviews.catalog_cache import category_cache, genre_cache
 from reviews.models import Category, Comment, Genre, Review, Title
-from users.models import CustomUser
+from users.models import USERNAME_FIELD_MAX_LENGTH, CustomUser
 
 SCORE_ERROR = 'Оценка по 10-бальной шкале!'
 REVIEW_ERROR = 'Пользователь может оставить только один отзыв!'
@@ -10,11 +11,57 @@ NAME_ME_ERROR = 'Использовать "me" в качестве имени п
 
 CONFIRMATION_CODE_NAX_LENGTH = 50
 
+SPARSE_FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request, available):
+    """
+    Поля из ?fields=, известные сериализатору, или None, если ответ
+    нужно отдать целиком. Учитываются только читающие запросы.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get(SPARSE_FIELDS_PARAM)
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(',')} & set(available)
+    return fields or None
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля, перечисленные в ?fields=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'), self.fields)
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """Ищет объект по slug в кеше справочника, а не запросом в базу."""
+
+    def __init__(self, catalog_cache, **kwargs):
+        self.catalog_cache = catalog_cache
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            obj = self.catalog_cache.get(data)
+        except TypeError:
+            self.fail('invalid')
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=data
+            )
+        return obj
+
 
 class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
-        exclude = ('id',)
+        exclude = ('id', 'name_search')
         model = Category
         lookup_field = 'slug'
 
@@ -22,20 +69,20 @@ class CategorySerializer(serializers.ModelSerializer):
 class GenreSerializer(serializers.ModelSerializer):
 
     class Meta:
-        exclude = ('id',)
+        exclude = ('id', 'mask_bit', 'name_search')
         model = Genre
         lookup_field = 'slug'
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
-    )
-    category = serializers.SlugRelatedField(
+    rating = serializers.IntegerField(read_only=True)
+    category = CachedSlugRelatedField(
+        catalog_cache=category_cache,
         queryset=Category.objects.all(),
         slug_field='slug'
     )
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        catalog_cache=genre_cache,
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True
@@ -49,7 +96,7 @@ class TitleReadSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class TitlesViewSerializer(serializers.ModelSerializer):
+class TitlesViewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(
         read_only=True,
@@ -65,7 +112,17 @@ class TitlesViewSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleDetailSerializer(TitlesViewSerializer):
+    """Страница произведения: дополнительно распределение оценок."""
+    rating_histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta(TitlesViewSerializer.Meta):
+        fields = TitlesViewSerializer.Meta.fields + ('rating_histogram',)
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     title = serializers.SlugRelatedField(
         slug_field='name',
         read_only=True
@@ -75,23 +132,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        user = self.context['request'].user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        if (
-            request.method == 'POST'
-            and user.reviews.filter(title_id=title_id).exists()
-        ):
-            raise ValidationError(REVIEW_ERROR)
-        return data
-
     class Meta:
         fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
     author = serializers.SlugRelatedField(
         read_only=True,
@@ -119,6 +165,8 @@ class SignUpSerializer(serializers.ModelSerializer):
 
 class TokenSerializer(serializers.ModelSerializer):
     """Сериализатор для Token."""
+    # Без проверки уникальности: токен выдаётся существующему пользователю.
+    username = serializers.CharField(max_length=USERNAME_FIELD_MAX_LENGTH)
     confirmation_code = serializers.CharField(
         max_length=CONFIRMATION_CODE_NAX_LENGTH,
         required=True
@@ -129,7 +177,7 @@ class TokenSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для кастомой модели пользователя."""
 
     class Meta:
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_CACHE_ALIAS = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+# Как часто (в секундах) процесс сливает расход токенов в общее хранилище
+# и перечитывает оттуда расход других процессов.
+THROTTLE_FLUSH_INTERVAL = getattr(settings, 'THROTTLE_FLUSH_INTERVAL', 1.0)
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/minute' -> (ёмкость 10, пополнение 10/60 токена в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / DURATIONS[period[0]]
+
+
+def refill(state, capacity, refill_rate, now):
+    tokens, updated_at = state
+    return min(capacity, tokens + (now - updated_at) * refill_rate)
+
+
+class BucketStore:
+    """
+    Корзины токенов в памяти процесса поверх общего кеша.
+
+    Решение по запросу принимается только по памяти. Раз в
+    THROTTLE_FLUSH_INTERVAL секунд израсходованные токены одной пачкой
+    вычитаются из корзин в общем кеше, а локальные копии сбрасываются и
+    при следующем обращении перечитываются уже с расходом других
+    процессов. Между сбросами процессы могут суммарно пропустить чуть
+    больше запросов, чем позволяет ёмкость корзины.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.buckets = {}
+        self.spent = Counter()
+        self.limits = {}
+        self.flushed_at = time.monotonic()
+
+    def cache(self):
+        return caches[THROTTLE_CACHE_ALIAS]
+
+    def take(self, key, capacity, refill_rate):
+        """Забирает токен. Возвращает (разрешено, секунд до нового токена)."""
+        with self.lock:
+            if time.monotonic() - self.flushed_at >= THROTTLE_FLUSH_INTERVAL:
+                self.flush()
+            now = time.time()
+            state = self.buckets.get(key)
+            if state is None:
+                state = self.cache().get(key) or (capacity, now)
+            tokens = refill(state, capacity, refill_rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                self.spent[key] += 1
+                self.limits[key] = (capacity, refill_rate)
+            self.buckets[key] = (tokens, now)
+            return allowed, None if allowed else (1 - tokens) / refill_rate
+
+    def flush(self):
+        if self.spent:
+            cache = self.cache()
+            now = time.time()
+            shared = cache.get_many(list(self.spent))
+            updated = {}
+            for key, spent in self.spent.items():
+                capacity, refill_rate = self.limits[key]
+                tokens = refill(
+                    shared.get(key, (capacity, now)),
+                    capacity, refill_rate, now
+                )
+                updated[key] = (max(tokens - spent, 0), now)
+            # Корзина полностью восстанавливается за capacity / refill_rate
+            # секунд, дольше хранить её незачем.
+            timeout = max(
+                capacity / refill_rate
+                for capacity, refill_rate in self.limits.values()
+            )
+            cache.set_many(updated, timeout)
+        self.reset()
+
+
+bucket_store = BucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов корзиной токенов. Ёмкость и скорость
+    пополнения берутся из DEFAULT_THROTTLE_RATES по ключу
+    '<throttle_scope вьюсета>_<kind>'; без такого ключа ограничения нет.
+    """
+    kind = None
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    store = bucket_store
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = f'{getattr(view, "throttle_scope", None)}_{self.kind}'
+        rate = self.rates.get(scope)
+        if rate is None:
+            return True
+        ident = self.get_ident_value(request)
+        if ident is None:
+            return True
+        digest = hashlib.md5(ident.encode()).hexdigest()
+        allowed, self.wait_time = self.store.take(
+            f'throttle:{scope}:{digest}', *parse_rate(rate)
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Ограничение по IP-адресу клиента."""
+    kind = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Ограничение по имени пользователя из тела запроса."""
+    kind = 'username'
+
+    def get_ident_value(self, request):
+        if not isinstance(request.data, Mapping):
+            # Тело без полей (например, JSON-список) отклонит сериализатор,
+            # а до того запрос расходует корзину своего IP-адреса. В именах
+            # пользователей двоеточия нет, поэтому ключи не пересекаются.
+            return f'ip:{self.get_ident(request)}'
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username[:150].lower()
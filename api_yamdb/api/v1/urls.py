@@ -1,5 +1,6 @@
 from rest_framework.routers import DefaultRouter
 
+from .urls_export import export_urlpatterns
 from .urls_review import review_urlpatterns
 from .urls_title import title_urlpatterns
 from .urls_users import user_urlpatterns
@@ -12,3 +13,4 @@ api_urlpatterns = []
 api_urlpatterns += user_urlpatterns
 api_urlpatterns += title_urlpatterns
 api_urlpatterns += review_urlpatterns
+api_urlpatterns += export_urlpatterns
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import ExportView
+
+export_urlpatterns = [
+    path(
+        'export/<slug:resource>/',
+        ExportView.as_view(),
+        name='export'
+    ),
+]
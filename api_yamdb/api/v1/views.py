@@ -1,38 +1,74 @@
+import hashlib
+import time
+from functools import partial
 from string import Template
 
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from rest_framework.settings import api_settings
+from rest_framework.status import (HTTP_200_OK, HTTP_400_BAD_REQUEST,
+                                   HTTP_404_NOT_FOUND)
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, GenericViewSet
-from rest_framework_simplejwt.tokens import AccessToken
 
 from users.models import CustomUser
+from users import outbox
+from users.tokens import access_token_for
 from .serializers import SignUpSerializer, TokenSerializer, UserSerializer, \
-    MeSerializer
-from .filters import TitleFilter
+    MeSerializer, requested_fields
+from .exports import (EXPORTS, export_rows, parse_since, stream_csv,
+                      stream_ndjson)
+from .filters import NormalizedSearchFilter, TitleFilter, UserFilter
+from .pagination import OptionalCursorPagination, PageKeysPagination
+from . import response_cache
 from .permissions import IsAdminOrReadOnly
+from .throttling import IPThrottle, UsernameThrottle
 
-from reviews.models import Category, Genre, Review, Title
+from reviews import leaderboards, recommendations, stamps
+from reviews.catalog_cache import (category_cache, genre_cache, related_index,
+                                   title_autocomplete)
+from reviews.models import HISTOGRAM_FIELDS, Category, Genre, Review, Title
+from reviews.search import normalize_search_text
 
 from .permissions import AuthorAndModerator, IsAdmin
 from .serializers import (
+    REVIEW_ERROR,
     CommentSerializer,
     ReviewSerializer,
+    TitleDetailSerializer,
     TitleReadSerializer,
     GenreSerializer,
     CategorySerializer,
     TitlesViewSerializer
 )
 
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+}
+EXPORT_NOT_FOUND_ERROR = 'Выгрузка не найдена!'
+EXPORT_FORMAT_ERROR = 'Формат выгрузки: ndjson или csv.'
+EXPORT_SINCE_ERROR = 'Параметр since должен быть датой или датой и временем.'
+EXPORT_SINCE_UNSUPPORTED_ERROR = 'Параметр since не поддерживается.'
+
+SHORTLIST_DEFAULT_LIMIT = 10
+SHORTLIST_MAX_LIMIT = 100
+SHORTLIST_LIMIT_ERROR = (
+    f'Параметр limit должен быть числом от 1 до {SHORTLIST_MAX_LIMIT}.'
+)
+TOP_BOARD_ERROR = 'Укажите либо жанр, либо категорию, но не оба сразу.'
+
 CONFIRMATION_CODE_ERROR = 'Код подтверждения некорректный!'
 CONFIRMATION_CODE_EMAIL_SUBJECT = ('YaMdb - Код подтверждения для '
                                    'получения токена')
@@ -43,6 +79,24 @@ CONFIRMATION_CODE_EMAIL_MESSAGE = Template(
 )
 
 
+def shortlist_limit(request):
+    """Длина подборки (лучшие, похожие, рекомендованные) из ?limit=."""
+    limit = request.query_params.get('limit', SHORTLIST_DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = 0
+    if not 1 <= limit <= SHORTLIST_MAX_LIMIT:
+        raise ValidationError({'limit': SHORTLIST_LIMIT_ERROR})
+    return limit
+
+
+def titles_in_order(queryset, title_ids):
+    """Произведения подборки в порядке title_ids."""
+    titles = queryset.in_bulk(title_ids)
+    return [titles[pk] for pk in title_ids if pk in titles]
+
+
 class CDLViewSet(mixins.CreateModelMixin,
                  mixins.DestroyModelMixin,
                  mixins.ListModelMixin,
@@ -53,9 +107,208 @@ class CDLViewSet(mixins.CreateModelMixin,
     pass
 
 
+class SparseFieldsViewSetMixin:
+    """
+    Для ?fields= ограничивает выборку колонками, нужными запрошенным полям.
+    В sparse_columns задаются поля сериализатора, которые читают другие
+    колонки модели (или не читают ни одной).
+    """
+    sparse_columns = {}
+
+    def get_sparse_fields(self):
+        return requested_fields(
+            self.request, self.get_serializer_class().Meta.fields
+        )
+
+    def get_sparse_columns(self, model, fields):
+        columns = {model._meta.pk.name}
+        for name in fields:
+            if name in self.sparse_columns:
+                columns.update(self.sparse_columns[name])
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(name)
+        return columns
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None or self.action not in ('list', 'retrieve'):
+            return queryset
+        return queryset.only(
+            *self.get_sparse_columns(queryset.model, fields)
+        )
+
+
+class NestedResourceMixin:
+    """
+    Родительский объект вложенного маршрута (произведение для отзывов,
+    отзыв для комментариев) ищется одним запросом и один раз за запрос.
+    parent_lookups сопоставляют поля parent_model с аргументами URL.
+    """
+    parent_model = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        if getattr(self, '_parent', None) is None:
+            self._parent = get_object_or_404(self.parent_model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_lookups.items()
+            })
+        return self._parent
+
+    def select_author(self, queryset):
+        """Автор нужен для ответа, если его не исключили через ?fields=."""
+        fields = self.get_sparse_fields()
+        if fields is None or 'author' in fields:
+            queryset = queryset.select_related('author')
+        return queryset
+
+
+class ConditionalListMixin:
+    """
+    ETag и Last-Modified по меткам версий из reviews.stamps: на
+    If-None-Match / If-Modified-Since отвечает 304, не выполняя запрос
+    к базе и сериализацию.
+    """
+
+    def get_stamp_names(self):
+        raise NotImplementedError
+
+    def get_validators(self, request):
+        names = [stamps.EPOCH, *self.get_stamp_names()]
+        versions = stamps.get_stamps(names)
+        digest = hashlib.md5('|'.join([
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            *(token for token, _ in versions),
+        ]).encode()).hexdigest()
+        return quote_etag(digest), max(
+            modified for _, modified in versions
+        )
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Условные GET-запросы и для списка, и для объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ResponseCacheMixin:
+    """
+    Кеширует данные ответов анонимным пользователям. Запись помнит метки
+    версий, от которых зависит (общие для запроса и по каждому отданному
+    объекту), и перестаёт действовать при сдвиге любой из них.
+
+    Метки читаются до обработчика: сдвиг, пришедший во время чтения
+    данных, оставит запись с прежними метками, и она сразу устареет.
+    """
+
+    def get_cache_tags(self):
+        raise NotImplementedError
+
+    def get_object_cache_tags(self, obj):
+        return ()
+
+    def get_served_cache_tags(self):
+        """Метки объектов, которые отдаст ответ, известные до обработчика."""
+        return ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.served_objects = []
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.served_objects.extend(page)
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        self.served_objects.append(obj)
+        return obj
+
+    def cached(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = response_cache.make_key(request)
+
+        def compute():
+            started = time.monotonic()
+            tokens = response_cache.read_tokens([
+                stamps.EPOCH, *self.get_cache_tags(),
+                *self.get_served_cache_tags(),
+            ])
+            response = handler(request, *args, **kwargs)
+            served = {
+                tag for obj in self.served_objects
+                for tag in self.get_object_cache_tags(obj)
+            }
+            # Объект, метку которого не прочитали заранее, мог измениться
+            # после чтения меток: такой ответ не сохраняем.
+            if response.status_code == HTTP_200_OK and served <= tokens.keys():
+                response_cache.store(
+                    key, tokens, response.data, time.monotonic() - started
+                )
+            return response
+
+        return response_cache.single_flight(key, compute)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+
+class CatalogCacheListMixin:
+    """Отдаёт список справочника из кеша процесса без запроса в базу."""
+    catalog_cache = None
+
+    def search(self, items):
+        terms = normalize_search_text(self.request.query_params.get(
+            api_settings.SEARCH_PARAM, ''
+        )).split()
+        return [
+            item for item in items
+            if all(term in item.name_search for term in terms)
+        ]
+
+    def list(self, request, *args, **kwargs):
+        items = self.search(self.catalog_cache.all())
+        page = self.paginate_queryset(items)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(items, many=True)
+        return Response(serializer.data)
+
+
 class CreateToken(APIView):
     """Вьюсет для создания токена."""
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -67,7 +320,7 @@ class CreateToken(APIView):
         confirmation_code = serializer.validated_data['confirmation_code']
 
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = access_token_for(user)
 
             return Response({'token': f'{token}'}, status=HTTP_200_OK)
 
@@ -77,6 +330,8 @@ class CreateToken(APIView):
 class Signup(APIView):
     """Вьюсет для регистрации пользователя."""
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -84,31 +339,68 @@ class Signup(APIView):
         email = serializer.validated_data['email']
         username = serializer.validated_data['username']
 
-        user = CustomUser.objects.create(username=username, email=email)
-        token = default_token_generator.make_token(user)
-
-        send_mail(
-            fail_silently=False,
-            from_email='test@test.com',
-            message=CONFIRMATION_CODE_EMAIL_MESSAGE.substitute(token=token),
-            recipient_list=[user.email],
-            subject=CONFIRMATION_CODE_EMAIL_MESSAGE,
-        )
+        with transaction.atomic():
+            user = CustomUser.objects.create(username=username, email=email)
+            token = default_token_generator.make_token(user)
+            outbox.enqueue(
+                from_email='test@test.com',
+                body=CONFIRMATION_CODE_EMAIL_MESSAGE.substitute(token=token),
+                recipient=user.email,
+                subject=CONFIRMATION_CODE_EMAIL_SUBJECT,
+            )
 
         return Response(serializer.data, status=HTTP_200_OK)
 
 
-class UserViewSet(ModelViewSet):
+class ExportView(APIView):
+    """Потоковая выгрузка таблицы целиком в NDJSON или CSV."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, resource):
+        if resource not in EXPORTS:
+            return Response(EXPORT_NOT_FOUND_ERROR, status=HTTP_404_NOT_FOUND)
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response(EXPORT_FORMAT_ERROR, status=HTTP_400_BAD_REQUEST)
+
+        since = request.query_params.get('since')
+        if since is not None:
+            if EXPORTS[resource]['date_field'] is None:
+                return Response(
+                    EXPORT_SINCE_UNSUPPORTED_ERROR,
+                    status=HTTP_400_BAD_REQUEST
+                )
+            try:
+                since = parse_since(since)
+            except ValueError:
+                return Response(
+                    EXPORT_SINCE_ERROR, status=HTTP_400_BAD_REQUEST
+                )
+
+        stream, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            stream(EXPORTS[resource]['fields'],
+                   export_rows(resource, since)),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{resource}.{output}"'
+        )
+        return response
+
+
+class UserViewSet(SparseFieldsViewSetMixin, ModelViewSet):
     """Вьюсет для моедли пользователя."""
 
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
-    filter_backends = (SearchFilter,)
+    filter_backends = (NormalizedSearchFilter, DjangoFilterBackend)
+    filterset_class = UserFilter
 
     permission_classes = (IsAdmin,)
 
     search_fields = (
-        'username',
+        'username_search',
     )
 
     def get_object(self):
@@ -127,7 +419,7 @@ class UserViewSet(ModelViewSet):
         PATCH-запрос на эндпоинт /api/v1/users/me/
         """
 
-        user = CustomUser.objects.get(username=request.user.username)
+        user = CustomUser.objects.get(pk=request.user.pk)
         serializer = MeSerializer(
             user,
             data=request.data,
@@ -138,79 +430,261 @@ class UserViewSet(ModelViewSet):
 
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='me/recommendations',
+    )
+    def me_recommendations(self, request):
+        """
+        Рекомендации по похожим на оценённые пользователем произведения,
+        GET-запрос на эндпоинт /api/v1/users/me/recommendations/
+        """
+        title_ids = recommendations.recommended_title_ids(
+            request.user, shortlist_limit(request)
+        )
+        titles = titles_in_order(
+            Title.objects.select_related('category').prefetch_related(
+                'genre'
+            ),
+            title_ids
+        )
+        return Response(TitlesViewSerializer(
+            titles, many=True, context=self.get_serializer_context()
+        ).data)
 
-class ReviewViewSet(ModelViewSet):
+
+class ReviewViewSet(ConditionalGetMixin, ResponseCacheMixin,
+                    NestedResourceMixin, SparseFieldsViewSetMixin,
+                    ModelViewSet):
     """
     Вьюсет для чтения, создания, изменения и удаления отзывов.
     """
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
     serializer_class = ReviewSerializer
+    pagination_class = OptionalCursorPagination
     permission_classes = [
         AuthorAndModerator,
     ]
 
-    def get_queryset(self):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+    def get_stamp_names(self):
+        # int: /titles/01/ - то же произведение 1 и та же метка.
+        return (
+            stamps.title_stamp(int(self.kwargs['title_id'])), stamps.USERS
+        )
 
-    def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+    def get_cache_tags(self):
+        return self.get_stamp_names()
 
+    def get_queryset(self):
+        return self.select_author(self.get_parent().reviews.all())
 
-class CommentViewSet(ModelViewSet):
+    def perform_create(self, serializer):
+        # Повторный отзыв отсекает ограничение unique_review: так нет
+        # лишнего запроса и гонки между проверкой и вставкой.
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author=self.request.user, title=self.get_parent()
+                )
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_ERROR]}
+            )
+
+
+class CommentViewSet(ResponseCacheMixin, NestedResourceMixin,
+                     SparseFieldsViewSetMixin, ModelViewSet):
     """
     Вьюсет для чтения, создания, изменения и удаления коментариев.
     """
+    parent_model = Review
+    # Отзыв должен принадлежать произведению из URL.
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
     serializer_class = CommentSerializer
+    pagination_class = OptionalCursorPagination
     permission_classes = [
         AuthorAndModerator,
     ]
 
+    def get_cache_tags(self):
+        return (
+            stamps.review_stamp(int(self.kwargs['review_id'])), stamps.USERS
+        )
+
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return self.select_author(self.get_parent().comments.all())
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, ResponseCacheMixin,
+                   SparseFieldsViewSetMixin, ModelViewSet):
     """Вьюсет для чтения, создания, изменения и удаления title."""
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
     permission_classes = (IsAdminOrReadOnly, )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = PageKeysPagination
+    # Метки произведений строятся из pk в URL.
+    lookup_value_regex = r'\d+'
+    sparse_columns = {
+        'rating': ('rating_sum', 'rating_count'),
+        'rating_histogram': HISTOGRAM_FIELDS,
+    }
+
+    def get_stamp_names(self):
+        if self.action == 'retrieve':
+            names = [stamps.title_stamp(int(self.kwargs[self.lookup_field]))]
+        else:
+            names = [stamps.TITLES]
+        return names + [stamps.GENRES, stamps.CATEGORIES]
+
+    def get_cache_tags(self):
+        if self.action == 'retrieve':
+            return self.get_stamp_names()
+        if self.action in ('top', 'similar', 'related'):
+            # Подборки пересчитываются вместе с оценками произведений.
+            return (stamps.TITLES, stamps.GENRES, stamps.CATEGORIES)
+        # Фильтры TitleFilter читают только поля, при изменении которых
+        # сдвигается TITLE_LIST: так замечает перемены и пустая страница.
+        # Фильтр по счётчикам отзывов потребовал бы метки TITLES.
+        return (stamps.TITLE_LIST, stamps.GENRES, stamps.CATEGORIES)
+
+    def get_object_cache_tags(self, obj):
+        # Объект и подборки зависят от меток из get_cache_tags, страница
+        # списка - ещё и от меток своих произведений.
+        if self.action != 'list':
+            return ()
+        return (stamps.title_stamp(obj.pk),)
+
+    def get_served_cache_tags(self):
+        # Ключи страницы выбираются вместе с числом записей, которое
+        # пагинатор затем не пересчитывает: запросов не прибавляется.
+        if self.action != 'list':
+            return ()
+        title_ids = self.paginator.page_keys(
+            self.filter_queryset(self.get_queryset()).prefetch_related(None),
+            self.request
+        )
+        return [stamps.title_stamp(title_id) for title_id in title_ids]
+
+    def get_queryset(self):
+        queryset = Title.objects.all()
+        fields = self.get_sparse_fields()
+        if fields is None or 'category' in fields:
+            queryset = queryset.select_related('category')
+        if fields is None or 'genre' in fields:
+            queryset = queryset.prefetch_related('genre')
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve',):
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
+        if self.action in ('list', 'top', 'similar', 'related'):
             return TitlesViewSerializer
         return TitleReadSerializer
 
+    def get_board(self):
+        """
+        Рейтинг из ?genre= или ?category= (по slug), без них - общий.
+        None, если жанра или категории с таким slug нет.
+        """
+        genre = self.request.query_params.get('genre')
+        category = self.request.query_params.get('category')
+        if genre and category:
+            raise ValidationError({'detail': TOP_BOARD_ERROR})
+        if genre:
+            genre = genre_cache.get(genre)
+            return genre and leaderboards.genre_board(genre.pk)
+        if category:
+            category = category_cache.get(category)
+            return category and leaderboards.category_board(category.pk)
+        return leaderboards.OVERALL
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """
+        Лучшие произведения по байесовской оценке из материализованных
+        рейтингов reviews.leaderboards:
+        /api/v1/titles/top/?genre=<slug>|category=<slug>&limit=<n>
+        """
+        board, limit = self.get_board(), shortlist_limit(request)
+        return self.conditional(partial(
+            self.cached, partial(self.shortlist, leaderboards.top_title_ids,
+                                 board, limit)
+        ), request)
+
+    @action(detail=True, url_path='similar')
+    def similar(self, request, pk=None):
+        """
+        Похожие произведения по оценкам пользователей, пересчитываются
+        командой build_recommendations: /api/v1/titles/<id>/similar/
+        """
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        limit = shortlist_limit(request)
+        return self.conditional(partial(
+            self.cached, partial(self.shortlist,
+                                 recommendations.similar_title_ids,
+                                 title.pk, limit)
+        ), request)
+
+    @action(detail=True, url_path='related')
+    def related(self, request, pk=None):
+        """
+        Произведения с похожими жанрами и той же категорией:
+        /api/v1/titles/<id>/related/
+        """
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        limit = shortlist_limit(request)
+        return self.conditional(partial(
+            self.cached, partial(self.shortlist, related_index.related,
+                                 title.pk, limit)
+        ), request)
+
+    @action(detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """
+        Подсказки названий из индекса в памяти процесса, без запросов к
+        базе: /api/v1/titles/autocomplete/?q=<начало слова>&limit=<n>
+        """
+        return Response(title_autocomplete.complete(
+            request.query_params.get('q', ''), shortlist_limit(request)
+        ))
+
+    def shortlist(self, get_title_ids, key, limit, request):
+        title_ids = get_title_ids(key, limit) if key else []
+        titles = titles_in_order(self.get_queryset(), title_ids)
+        self.served_objects.extend(titles)
+        return Response(self.get_serializer(titles, many=True).data)
+
 
-class GenreViewSet(CDLViewSet):
+class GenreViewSet(ConditionalListMixin, CatalogCacheListMixin,
+                   CDLViewSet):
     """Вьюсет для чтения, создания, изменения и удаления жанра."""
     queryset = Genre.objects.all()
+    catalog_cache = genre_cache
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly, )
-    filter_backends = (SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('name_search',)
     lookup_field = 'slug'
 
+    def get_stamp_names(self):
+        return (stamps.GENRES,)
 
-class CategoryViewSet(CDLViewSet):
+
+class CategoryViewSet(ConditionalListMixin, CatalogCacheListMixin,
+                      CDLViewSet):
     """Вьюсет для чтения, создания, изменения и удаления категории."""
     queryset = Category.objects.all()
+    catalog_cache = category_cache
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly, )
-    filter_backends = (SearchFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('name_search',)
     lookup_field = 'slug'
+
+    def get_stamp_names(self):
+        return (stamps.CATEGORIES,)
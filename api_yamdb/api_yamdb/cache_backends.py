@@ -0,0 +1,37 @@
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SweepingFileBasedCache(FileBasedCache):
+    """
+    Файловый кеш, который не вытесняет действующие записи.
+
+    FileBasedCache на каждой записи перечитывает каталог и, набрав
+    MAX_ENTRIES файлов, удаляет случайную их часть. Здесь каталог
+    просматривается не чаще раза в OPTIONS['SWEEP_INTERVAL'] секунд, а при
+    MAX_ENTRIES и больше файлов удаляются только истёкшие записи.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._sweep_interval = params.get('OPTIONS', {}).get(
+            'SWEEP_INTERVAL', 60
+        )
+        self._swept_at = None
+
+    def _cull(self):
+        now = time.monotonic()
+        if (self._swept_at is not None
+                and now - self._swept_at < self._sweep_interval):
+            return
+        self._swept_at = now
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as f:
+                    self._is_expired(f)
+            except FileNotFoundError:
+                pass
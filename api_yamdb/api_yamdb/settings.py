@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -108,13 +109,67 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 
+# CACHE
+
+# Метки версий (reviews.stamps) и версии справочников (catalog_cache)
+# лежат в общем для всех процессов сервера кеше 'versions': через него
+# процессы узнают об изменениях, сделанных другими. С LocMemCache каждый
+# процесс видел бы только свои изменения и отдавал бы 304 и кешированные
+# страницы для устаревших данных. Вместо файлов подойдёт DatabaseCache
+# (LOCATION - имя таблицы, python manage.py createcachetable) или другой
+# общий бэкенд.
+# Метки не истекают и не должны вытесняться: потерянная метка создаётся
+# заново и сбрасывает ETag и кешированные ответы, поэтому MAX_ENTRIES
+# берётся с запасом над числом произведений и отзывов.
+# Кеш ответов можно перевести на FileBasedCache (LOCATION - каталог) или
+# DatabaseCache; его записи хранят метки версий, с которыми они собраны,
+# и сверяются с ними при чтении, поэтому он может оставаться своим у
+# каждого процесса.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'versions': {
+        'BACKEND': 'api_yamdb.cache_backends.SweepingFileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'api_yamdb_versions'),
+        'OPTIONS': {'MAX_ENTRIES': 1000000, 'SWEEP_INTERVAL': 60},
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+    },
+    # Общий для всех процессов сервера: корзины токенов ограничителей.
+    # Вытесненная корзина вернулась бы полной, поэтому бэкенд удаляет
+    # только истёкшие, а MAX_ENTRIES - порог, с которого их ищут.
+    'throttle': {
+        'BACKEND': 'api_yamdb.cache_backends.SweepingFileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'api_yamdb_throttle'),
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'SWEEP_INTERVAL': 60},
+    },
+}
+
+CATALOG_CACHE_ALIAS = 'versions'
+STAMPS_CACHE_ALIAS = 'versions'
+CATALOG_VERSION_CHECK_INTERVAL = 1.0
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_STALE_WHILE_REVALIDATE = 30
+RESPONSE_CACHE_EARLY_EXPIRATION_BETA = 1.0
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT = 2.0
+RESPONSE_CACHE_POLL_INTERVAL = 0.02
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+THROTTLE_FLUSH_INTERVAL = 1.0
+
 # REST_FRAMEWORK
 
 TITLES_PER_PAGE = 10
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.ClaimsJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -125,6 +180,14 @@ REST_FRAMEWORK = {
         'rest_framework.pagination.LimitOffsetPagination',
 
     'PAGE_SIZE': TITLES_PER_PAGE,
+
+    # Корзины токенов api.v1.throttling: '<throttle_scope>_<ip|username>'.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '20/hour',
+        'signup_username': '5/hour',
+        'token_ip': '60/minute',
+        'token_username': '10/minute',
+    },
 }
 
 # JWT
@@ -135,6 +198,12 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Версии прав пользователей для ClaimsJWTAuthentication. Кеш общий для
+# процессов: смена роли сбрасывает версию сразу во всех, а не через
+# AUTH_VERSION_CACHE_TIMEOUT секунд.
+AUTH_VERSION_CACHE_ALIAS = 'versions'
+AUTH_VERSION_CACHE_TIMEOUT = 30
+
 # EMAIL
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -143,3 +212,29 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_HOST = 'smtp.email-domain.com'
 EMAIL_HOST_USER = 'test@test.com'
 EMAIL_HOST_PASSWORD = 'pass123'
+
+# Очередь писем (users.outbox), её разбирает manage.py run_mail_worker.
+MAIL_OUTBOX_BATCH_SIZE = 100
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+MAIL_OUTBOX_BACKOFF = 30
+MAIL_OUTBOX_MAX_BACKOFF = 3600
+MAIL_OUTBOX_EAGER = False
+
+# Рейтинги лучших произведений (reviews.leaderboards): байесовская оценка
+# с LEADERBOARD_PRIOR_COUNT воображаемыми отзывами по LEADERBOARD_PRIOR_MEAN.
+LEADERBOARD_PRIOR_MEAN = 5.5
+LEADERBOARD_PRIOR_COUNT = 5
+
+# Похожие произведения (reviews.recommendations), пересчитываются
+# командой manage.py build_recommendations.
+RECOMMENDATION_NEIGHBORS = 20
+RECOMMENDATION_BLOCK_SIZE = 5000
+RECOMMENDATION_CHUNK_SIZE = 10000
+RECOMMENDATION_HISTORY = 200
+
+# /titles/<id>/related/: вес общей категории рядом со сходством жанров.
+RELATED_CATEGORY_WEIGHT = 0.5
+
+# Подсказки названий /titles/autocomplete/ (reviews.catalog_cache).
+AUTOCOMPLETE_MAX_AGE = 300
+AUTOCOMPLETE_RELOAD_INTERVAL = 30
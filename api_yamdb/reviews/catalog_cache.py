@@ -0,0 +1,494 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from functools import partial
+from itertools import groupby
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .models import Category, Genre, Title
+from .search import normalize_search_text
+
+CATALOG_CACHE_ALIAS = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+CATALOG_VERSION_CHECK_INTERVAL = getattr(
+    settings, 'CATALOG_VERSION_CHECK_INTERVAL', 1.0
+)
+RELATED_CATEGORY_WEIGHT = getattr(settings, 'RELATED_CATEGORY_WEIGHT', 0.5)
+# Число отзывов для ранжирования подсказок меняется без сигналов Title:
+# другие процессы перечитывают индекс не реже раза в AUTOCOMPLETE_MAX_AGE с.
+AUTOCOMPLETE_MAX_AGE = getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300)
+# Об изменении названий в другом процессе индекс узнаёт по общей метке
+# версии и перечитывается в фоне, но не чаще раза в
+# AUTOCOMPLETE_RELOAD_INTERVAL с.
+AUTOCOMPLETE_RELOAD_INTERVAL = getattr(
+    settings, 'AUTOCOMPLETE_RELOAD_INTERVAL', 30
+)
+# Короткие префиксы совпадают с множеством названий: для них готовы
+# списки лучших подсказок. В списке держится запас до
+# AUTOCOMPLETE_TOP_RESERVE id, чтобы выбывшие из него названия не
+# требовали сразу пересчёта.
+AUTOCOMPLETE_TOP_LENGTH = 2
+AUTOCOMPLETE_TOP_SIZE = 100
+AUTOCOMPLETE_TOP_RESERVE = 2 * AUTOCOMPLETE_TOP_SIZE
+# Больше любого символа нормализованного названия: граница bisect.
+MAX_CHAR = chr(0x10ffff)
+
+WORD_START_PATTERN = re.compile(r'\b\w')
+
+
+def bit_count(bits):
+    """Число установленных битов (int.bit_count есть только с Python 3.10)."""
+    return bin(bits).count('1')
+
+
+class CatalogCache:
+    """
+    Копия маленькой справочной таблицы в памяти процесса.
+
+    Таблица перечитывается при первом обращении и после инвалидации.
+    Общая метка версии лежит в кеше Django: её смена в другом процессе
+    замечается не позже чем через CATALOG_VERSION_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'catalog_version:{model._meta.label_lower}'
+        self._items = None
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def shared(self):
+        return caches[CATALOG_CACHE_ALIAS]
+
+    def items(self):
+        now = time.monotonic()
+        if (
+            self._items is None
+            or now - self._checked_at >= CATALOG_VERSION_CHECK_INTERVAL
+        ):
+            version = self.shared.get(self.version_key)
+            if self._items is None or version != self._version:
+                self.reload(version)
+            self._checked_at = now
+        return self._items
+
+    def reload(self, version):
+        self._items = {
+            obj.slug: obj for obj in self.model.objects.order_by('pk')
+        }
+        self._version = version
+
+    def all(self):
+        return list(self.items().values())
+
+    def get(self, slug):
+        return self.items().get(slug)
+
+    def invalidate(self):
+        self._items = None
+        self.shared.set(self.version_key, uuid4().hex, None)
+
+
+class RelatedTitlesIndex(CatalogCache):
+    """
+    Жанры и категории всех произведений для /titles/<id>/related/.
+
+    Словарь items() сопоставляет id произведения пару (битовая маска
+    жанров, id категории). Бит жанра - его номер среди жанров со связями
+    по возрастанию id: id растут без повторов, и маска по самим id
+    разрасталась бы вместе с ними. Произведения с одинаковой парой
+    собраны в группу - список их id по возрастанию. Сходство с группой
+    (коэффициент Жаккара по жанрам плюс RELATED_CATEGORY_WEIGHT за общую
+    категорию) у всех её произведений одно, поэтому запрос оценивает
+    только группы, а из произведений перебирает не больше limit первых
+    подходящих.
+    """
+
+    def __init__(self, model):
+        super().__init__(model)
+        self._groups = []
+
+    def reload(self, version):
+        links = list(Title.genre.through.objects.values_list(
+            'title_id', 'genre_id'
+        ))
+        positions = {
+            genre_id: position for position, genre_id in enumerate(
+                sorted({genre_id for _, genre_id in links})
+            )
+        }
+        masks = {}
+        for title_id, genre_id in links:
+            masks[title_id] = masks.get(title_id, 0) | 1 << positions[
+                genre_id
+            ]
+        keys = {}
+        groups = {}
+        for title_id, category_id in self.model.objects.order_by(
+            'pk'
+        ).values_list('pk', 'category_id').iterator():
+            key = (masks.get(title_id, 0), category_id)
+            keys[title_id] = key
+            groups.setdefault(key, []).append(title_id)
+        self._groups = [
+            (mask, bit_count(mask), category_id, members)
+            for (mask, category_id), members in groups.items()
+        ]
+        self._items = keys
+        self._version = version
+
+    def related(self, title_id, limit):
+        """id произведений, ближайших к title_id по жанрам и категории."""
+        key = self.get(title_id)
+        groups = self._groups
+        if key is None:
+            return []
+        mask, category_id = key
+        genres = bit_count(mask)
+        scored = []
+        for other_mask, other_genres, other_category_id, members in groups:
+            common = bit_count(mask & other_mask)
+            union = genres + other_genres - common
+            score = common / union if union else 0
+            if other_category_id == category_id:
+                score += RELATED_CATEGORY_WEIGHT
+            if score > 0:
+                # При равном сходстве раньше группа с меньшими id.
+                scored.append((-score, members[0], members))
+        # Обычно limit набирается из первых групп: полная сортировка
+        # не нужна.
+        heapq.heapify(scored)
+        result = []
+        while scored and len(result) < limit:
+            for member in heapq.heappop(scored)[2]:
+                if member == title_id:
+                    continue
+                result.append(member)
+                if len(result) == limit:
+                    break
+        return result
+
+
+def word_keys(text):
+    """Хвосты нормализованного названия от начала каждого слова."""
+    return [text[match.start():] for match in WORD_START_PATTERN.finditer(
+        text
+    )]
+
+
+def short_prefixes(text):
+    """Префиксы слов названия не длиннее AUTOCOMPLETE_TOP_LENGTH."""
+    return {
+        key[:length]
+        for key in word_keys(text)
+        for length in range(1, AUTOCOMPLETE_TOP_LENGTH + 1)
+    }
+
+
+def title_rank(titles, title_id):
+    """Ключ порядка подсказок: больше отзывов, затем по названию."""
+    _, name_search, _, reviews = titles[title_id]
+    return -reviews, name_search, title_id
+
+
+def top_lists(entries, titles):
+    """
+    Лучшие id для префиксов не длиннее AUTOCOMPLETE_TOP_LENGTH и префиксы,
+    которым подходит больше названий, чем попало в список.
+    """
+    tops = {}
+    truncated = set()
+
+    def keep(prefix, title_ids, cut=False):
+        if cut or len(title_ids) > AUTOCOMPLETE_TOP_RESERVE:
+            truncated.add(prefix)
+        tops[prefix] = [rank[2] for rank in heapq.nsmallest(
+            AUTOCOMPLETE_TOP_RESERVE,
+            [(-titles[pk][3], titles[pk][1], pk) for pk in title_ids]
+        )]
+
+    for prefix, group in groupby(
+        entries, key=lambda entry: entry[0][:AUTOCOMPLETE_TOP_LENGTH]
+    ):
+        keep(prefix, {title_id for _, title_id in group})
+    # Лучшие по префиксу есть среди лучших по его продолжениям, поэтому
+    # списки коротких префиксов собираются из уже готовых.
+    for length in range(AUTOCOMPLETE_TOP_LENGTH - 1, 0, -1):
+        merged = defaultdict(set)
+        cut = set()
+        for prefix, title_ids in tops.items():
+            if len(prefix) >= length:
+                merged[prefix[:length]].update(title_ids)
+                if prefix in truncated:
+                    cut.add(prefix[:length])
+        for prefix, title_ids in merged.items():
+            keep(prefix, title_ids, prefix in cut)
+    return tops, truncated
+
+
+def matches_prefix(name_search, prefix):
+    return any(key.startswith(prefix) for key in word_keys(name_search))
+
+
+class TitleAutocomplete(CatalogCache):
+    """
+    Подсказки названий произведений для /titles/autocomplete/.
+
+    items() - словарь id -> (название, нормализованное название, год, число
+    отзывов). Рядом лежит отсортированный список пар (хвост названия с
+    начала слова, id): все названия с префиксом идут в нём подряд и
+    находятся bisect. Для префиксов не длиннее AUTOCOMPLETE_TOP_LENGTH
+    хранятся готовые списки лучших по числу отзывов id. Сигналы Title и
+    отзывов правят всё это на месте под блокировкой; ранжирование запроса
+    идёт без неё. Другие процессы замечают изменения по общей метке
+    версии и перечитывают индекс в фоне.
+    """
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.version_key = f'{self.version_key}:autocomplete'
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._entries = []
+        self._tops = {}
+        self._truncated = set()
+        self._loaded_at = 0.0
+        self._reloading = False
+        # Изменения, сделанные во время перезагрузки: они применяются и к
+        # прочитанному ею индексу. Сдвиг числа отзывов, уже попавший в
+        # прочитанные строки, учтётся дважды до следующей перезагрузки.
+        self._pending = None
+
+    def items(self):
+        titles = self._items
+        if titles is None:
+            with self._reload_lock:
+                if self._items is None:
+                    self.reload(self.shared.get(self.version_key))
+                    self._checked_at = time.monotonic()
+            return self._items
+        now = time.monotonic()
+        if now - self._checked_at >= CATALOG_VERSION_CHECK_INTERVAL:
+            self._checked_at = now
+            age = now - self._loaded_at
+            if age >= AUTOCOMPLETE_RELOAD_INTERVAL and (
+                age >= AUTOCOMPLETE_MAX_AGE
+                or self.shared.get(self.version_key) != self._version
+            ):
+                self.reload_in_background()
+        return titles
+
+    def reload(self, version):
+        with self._lock:
+            self._pending = []
+        try:
+            titles = {}
+            entries = []
+            rows = self.model.objects.values_list(
+                'pk', 'name', 'name_search', 'year', 'rating_count'
+            ).iterator()
+            for pk, name, name_search, year, reviews in rows:
+                titles[pk] = (name, name_search, year, reviews)
+                entries.extend((key, pk) for key in word_keys(name_search))
+            entries.sort()
+            tops, truncated = top_lists(entries, titles)
+            with self._lock:
+                self._items = titles
+                self._entries = entries
+                self._tops = tops
+                self._truncated = truncated
+                for operation, args in self._pending:
+                    operation(*args)
+                self._version = version
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def reload_in_background(self):
+        """Перечитывает индекс в отдельном потоке, пока отвечает старый."""
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload_in_thread, daemon=True).start()
+
+    def _reload_in_thread(self):
+        try:
+            with self._reload_lock:
+                self.reload(self.shared.get(self.version_key))
+        finally:
+            self._reloading = False
+            # Соединения с базой у каждого потока свои.
+            connections.close_all()
+
+    def publish(self):
+        """Сообщает другим процессам об изменении, не перечитывая свой."""
+        version = uuid4().hex
+        self.shared.set(self.version_key, version, None)
+        self._version = version
+
+    def _apply(self, operation, *args):
+        with self._lock:
+            if self._items is not None:
+                operation(*args)
+            if self._pending is not None:
+                self._pending.append((operation, args))
+
+    def _place(self, prefix, title_id):
+        """Ставит title_id на его место в списке лучших по префиксу."""
+        top = self._tops.setdefault(prefix, [])
+        if title_id in top:
+            top.remove(title_id)
+        titles = self._items
+        rank = title_rank(titles, title_id)
+        low, high = 0, len(top)
+        while low < high:
+            middle = (low + high) // 2
+            if title_rank(titles, top[middle]) < rank:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(top) and prefix in self._truncated:
+            # Ниже последнего в неполном списке могут оказаться названия,
+            # которых в нём нет.
+            return
+        top.insert(low, title_id)
+        if len(top) > AUTOCOMPLETE_TOP_RESERVE:
+            top.pop()
+            self._truncated.add(prefix)
+
+    def _discard(self, title_id):
+        old = self._items.pop(title_id, None)
+        if old is None:
+            return
+        entries = self._entries
+        for key in word_keys(old[1]):
+            index = bisect_left(entries, (key, title_id))
+            if index < len(entries) and entries[index] == (key, title_id):
+                del entries[index]
+        for prefix in short_prefixes(old[1]):
+            top = self._tops.get(prefix, [])
+            if title_id in top:
+                top.remove(title_id)
+
+    def _put(self, title_id, name, name_search, year, reviews):
+        old = self._items.get(title_id)
+        if old is not None:
+            # Свой счётчик отзывов точнее, чем в сохраняемом экземпляре.
+            reviews = old[3]
+        self._discard(title_id)
+        self._items[title_id] = (name, name_search, year, reviews)
+        for key in word_keys(name_search):
+            insort(self._entries, (key, title_id))
+        for prefix in short_prefixes(name_search):
+            self._place(prefix, title_id)
+
+    def _shift(self, title_id, delta):
+        old = self._items.get(title_id)
+        if old is None:
+            return
+        name, name_search, year, reviews = old
+        self._items[title_id] = (name, name_search, year, reviews + delta)
+        for prefix in short_prefixes(name_search):
+            self._place(prefix, title_id)
+
+    def put(self, title):
+        self._apply(
+            self._put, title.pk, title.name, title.name_search, title.year,
+            title.rating_count
+        )
+        self.publish()
+
+    def remove(self, title_id):
+        self._apply(self._discard, title_id)
+        self.publish()
+
+    def shift_reviews(self, title_id, delta):
+        self._apply(self._shift, title_id, delta)
+
+    @staticmethod
+    def suggestions(titles, title_ids):
+        return [
+            {'id': pk, 'name': title[0], 'year': title[2]}
+            for pk, title in zip(title_ids, map(titles.get, title_ids))
+            if title is not None
+        ]
+
+    def ranked(self, titles, prefix, size):
+        """
+        Лучшие size id с префиксом по полному списку совпадений. Диапазон
+        копируется под блокировкой, сортировка идёт уже без неё.
+        """
+        with self._lock:
+            entries = self._entries
+            matches = entries[
+                bisect_left(entries, (prefix,)):
+                bisect_left(entries, (prefix + MAX_CHAR,))
+            ]
+        ranks = []
+        for pk in {pk for _, pk in matches}:
+            title = titles.get(pk)
+            if title is not None:
+                ranks.append((-title[3], title[1], pk))
+        return [rank[2] for rank in heapq.nsmallest(size, ranks)]
+
+    def refill(self, titles, prefix):
+        """Заново набирает список префикса, растерявший запас."""
+        title_ids = self.ranked(titles, prefix, AUTOCOMPLETE_TOP_RESERVE + 1)
+        with self._lock:
+            if titles is not self._items:
+                return
+            # Названия, поднявшиеся в список за время подсчёта, остаются.
+            candidates = {
+                pk for pk in {*title_ids, *self._tops.get(prefix, [])}
+                if pk in titles and matches_prefix(titles[pk][1], prefix)
+            }
+            top = sorted(candidates, key=partial(title_rank, titles))
+            if len(top) > AUTOCOMPLETE_TOP_RESERVE:
+                del top[AUTOCOMPLETE_TOP_RESERVE:]
+            else:
+                self._truncated.discard(prefix)
+            self._tops[prefix] = top
+
+    def complete(self, text, limit):
+        """Не больше limit подсказок для начала слова названия."""
+        prefix = normalize_search_text(text)
+        if not prefix:
+            return []
+        titles = self.items()
+        if (
+            len(prefix) > AUTOCOMPLETE_TOP_LENGTH
+            or limit > AUTOCOMPLETE_TOP_SIZE
+        ):
+            return self.suggestions(
+                titles, self.ranked(titles, prefix, limit)
+            )
+        with self._lock:
+            top = self._tops.get(prefix, [])[:limit]
+            short = len(top) < limit and prefix in self._truncated
+        if short:
+            self.refill(titles, prefix)
+            with self._lock:
+                top = self._tops.get(prefix, [])[:limit]
+        return self.suggestions(titles, top)
+
+
+genre_cache = CatalogCache(Genre)
+category_cache = CatalogCache(Category)
+related_index = RelatedTitlesIndex(Title)
+title_autocomplete = TitleAutocomplete(Title)
+CATALOG_CACHES = (genre_cache, category_cache, related_index,
+                  title_autocomplete)
+
+
+def invalidate_catalog():
+    for catalog_cache in CATALOG_CACHES:
+        catalog_cache.invalidate()
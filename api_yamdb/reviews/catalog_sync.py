@@ -0,0 +1,220 @@
+import csv
+import os
+import time
+from collections import defaultdict
+
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from . import genre_masks, leaderboards, search, stamps
+from .catalog_cache import invalidate_catalog
+from .models import Category, Genre, Title
+
+PHASES = ('diff', 'insert', 'update', 'delete')
+
+GenreTitle = Title.genre.through
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+class CatalogSync:
+    """
+    Приводит каталог (категории, жанры, произведения и их связи) к
+    состоянию CSV-снимка: добавляет новые строки, обновляет изменённые и
+    удаляет отсутствующие в снимке.
+
+    Категории и жанры сопоставляются по slug, произведения по id,
+    связи произведение-жанр по паре (title_id, genre_id). Маски жанров и
+    рейтинги пересчитываются только для затронутых произведений, а метки
+    версий сдвигаются, только если каталог изменился.
+    """
+
+    def __init__(self, path, batch_size):
+        self.path = path
+        self.batch_size = batch_size
+        self.counts = defaultdict(lambda: dict.fromkeys(
+            ('inserted', 'updated', 'deleted'), 0
+        ))
+        self.timings = defaultdict(float)
+        self.stale = {}
+        # Добавленные, изменённые, удалённые и перепривязанные к жанрам.
+        self.title_ids = set()
+
+    def file_path(self, filename):
+        path = os.path.join(self.path, filename)
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        return path
+
+    def timed(self, phase, func, *args):
+        started = time.monotonic()
+        result = func(*args)
+        self.timings[phase] += time.monotonic() - started
+        return result
+
+    def run(self):
+        with transaction.atomic():
+            category_ids = self.sync_by_slug(Category, 'category.csv')
+            genre_ids = self.sync_by_slug(Genre, 'genre.csv')
+            self.sync_titles(category_ids)
+            self.sync_genre_titles(genre_ids)
+            # Удаляем в обратном порядке, чтобы не нарушить внешние ключи.
+            for model in (GenreTitle, Title, Genre, Category):
+                self.timed('delete', self.delete_stale, model)
+            if not self.changed():
+                return
+            self.timed('update', genre_masks.assign_bits)
+            title_ids = sorted(self.title_ids)
+            for start in range(0, len(title_ids), self.batch_size):
+                batch = title_ids[start:start + self.batch_size]
+                self.timed('update', genre_masks.refresh_masks, batch)
+                self.timed('update', leaderboards.refresh_titles, batch)
+            transaction.on_commit(invalidate_catalog)
+            stamps.bump(stamps.EPOCH)
+
+    def changed(self):
+        return any(
+            any(counts.values()) for counts in self.counts.values()
+        )
+
+    def apply(self, model, to_create, to_update, fields):
+        self.timed(
+            'insert', model.objects.bulk_create, to_create, self.batch_size
+        )
+        if to_update:
+            self.timed(
+                'update', model.objects.bulk_update,
+                to_update, fields, self.batch_size
+            )
+        self.counts[model]['inserted'] += len(to_create)
+        self.counts[model]['updated'] += len(to_update)
+        if model is Title:
+            self.title_ids.update(obj.pk for obj in to_create + to_update)
+
+    def delete_stale(self, model):
+        stale_ids = self.stale.get(model, [])
+        for start in range(0, len(stale_ids), self.batch_size):
+            model.objects.filter(
+                pk__in=stale_ids[start:start + self.batch_size]
+            ).delete()
+        self.counts[model]['deleted'] += len(stale_ids)
+        if model is Title:
+            self.title_ids.update(stale_ids)
+
+    def diff(self, existing, rows, key, fields, model):
+        # bulk_create и bulk_update обходят сигналы, поэтому поисковая
+        # колонка заполняется здесь же.
+        to_create, to_update = [], []
+        for row in rows:
+            obj = existing.pop(row[key], None)
+            if obj is None:
+                obj = model(**row)
+                search.fill_search_column(obj)
+                to_create.append(obj)
+                continue
+            changed = False
+            for field in fields:
+                if getattr(obj, field) != row[field]:
+                    setattr(obj, field, row[field])
+                    changed = True
+            if changed:
+                search.fill_search_column(obj)
+                to_update.append(obj)
+        self.stale[model] = [obj.pk for obj in existing.values()]
+        return to_create, to_update
+
+    def sync_by_slug(self, model, filename):
+        """Синхронизирует справочник и возвращает словарь id CSV -> id БД."""
+        started = time.monotonic()
+        csv_ids = {}
+        rows = []
+        for row in read_csv(self.file_path(filename)):
+            csv_ids[row['slug']] = int(row['id'])
+            rows.append({'name': row['name'], 'slug': row['slug']})
+        existing = {obj.slug: obj for obj in model.objects.all()}
+        to_create, to_update = self.diff(
+            existing, rows, 'slug', ('name',), model
+        )
+        self.timings['diff'] += time.monotonic() - started
+        self.apply(model, to_create, to_update, ('name', 'name_search'))
+        return {
+            csv_ids[slug]: pk
+            for slug, pk in model.objects.filter(
+                slug__in=csv_ids
+            ).values_list('slug', 'pk')
+        }
+
+    def sync_titles(self, category_ids):
+        started = time.monotonic()
+        rows = []
+        for row in read_csv(self.file_path('titles.csv')):
+            try:
+                category_id = category_ids[int(row['category'])]
+            except KeyError:
+                raise CommandError(
+                    f'Произведение {row["id"]}: неизвестная категория '
+                    f'{row["category"]}'
+                )
+            rows.append({
+                'id': int(row['id']),
+                'name': row['name'],
+                'year': int(row['year']),
+                'category_id': category_id,
+            })
+        fields = ('name', 'year', 'category_id')
+        existing = Title.objects.only('id', *fields).in_bulk()
+        to_create, to_update = self.diff(existing, rows, 'id', fields, Title)
+        self.timings['diff'] += time.monotonic() - started
+        self.apply(
+            Title, to_create, to_update,
+            ('name', 'name_search', 'year', 'category')
+        )
+
+    def sync_genre_titles(self, genre_ids):
+        started = time.monotonic()
+        wanted = set()
+        for row in read_csv(self.file_path('genre_title.csv')):
+            try:
+                genre_id = genre_ids[int(row['genre_id'])]
+            except KeyError:
+                raise CommandError(
+                    f'Связь {row["id"]}: неизвестный жанр {row["genre_id"]}'
+                )
+            wanted.add((int(row['title_id']), genre_id))
+        existing = {
+            (title_id, genre_id): pk
+            for pk, title_id, genre_id in GenreTitle.objects.values_list(
+                'pk', 'title_id', 'genre_id'
+            )
+        }
+        to_create = [
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id, genre_id in wanted - existing.keys()
+        ]
+        stale = {
+            pair: pk for pair, pk in existing.items() if pair not in wanted
+        }
+        self.stale[GenreTitle] = list(stale.values())
+        self.title_ids.update(
+            title_id for title_id, _ in wanted - existing.keys()
+        )
+        self.title_ids.update(title_id for title_id, _ in stale)
+        self.timings['diff'] += time.monotonic() - started
+        self.apply(GenreTitle, to_create, [], ())
+
+    def report(self):
+        lines = []
+        for model in (Category, Genre, Title, GenreTitle):
+            counts = self.counts[model]
+            lines.append(
+                f'{model._meta.db_table}: добавлено {counts["inserted"]}, '
+                f'обновлено {counts["updated"]}, '
+                f'удалено {counts["deleted"]}'
+            )
+        lines.append('Время: ' + ', '.join(
+            f'{phase} {self.timings[phase]:.3f} с' for phase in PHASES
+        ))
+        return lines
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import GENRE_MASK_BITS, Genre, Title
+
+GenreTitle = Title.genre.through
+
+# Режимы ?genre_mode= для нескольких жанров в ?genre=.
+ALL = 'all'
+ANY = 'any'
+
+
+def genre_bit(genre):
+    return 1 << genre.mask_bit
+
+
+def free_bits():
+    taken = set(Genre.objects.filter(mask_bit__isnull=False).values_list(
+        'mask_bit', flat=True
+    ))
+    return [bit for bit in range(GENRE_MASK_BITS) if bit not in taken]
+
+
+def assign_bits():
+    """
+    Раздаёт свободные биты жанрам без бита (созданным в обход сигналов).
+    Жанрам, которым бита не хватило, фильтр подбирает произведения через
+    таблицу связей.
+    """
+    with transaction.atomic():
+        genres = list(Genre.objects.select_for_update().filter(
+            mask_bit__isnull=True
+        ).order_by('pk'))
+        for genre, bit in zip(genres, free_bits()):
+            genre.mask_bit = bit
+        Genre.objects.bulk_update(genres, ['mask_bit'])
+
+
+def refresh_masks(title_ids=None):
+    """Пересчитывает маски жанров произведений (по умолчанию - всех)."""
+    titles = Title.objects.order_by('pk')
+    if title_ids is not None:
+        titles = titles.filter(pk__in=list(title_ids))
+    current = dict(titles.values_list('pk', 'genre_mask'))
+    masks = dict.fromkeys(current, 0)
+    links = GenreTitle.objects.filter(
+        title_id__in=titles.values('pk'), genre__mask_bit__isnull=False
+    ).values_list('title_id', 'genre__mask_bit')
+    for title_id, bit in links:
+        masks[title_id] |= 1 << bit
+    # Записываются только маски, которые действительно изменились.
+    changed = [
+        Title(pk=title_id, genre_mask=mask)
+        for title_id, mask in masks.items() if mask != current[title_id]
+    ]
+    Title.objects.bulk_update(changed, ['genre_mask'], batch_size=1000)
+
+
+def titles_with_bit(bit):
+    return Title.objects.annotate(
+        genre_bit=F('genre_mask').bitand(1 << bit)
+    ).exclude(genre_bit=0).values_list('pk', flat=True)
+
+
+def rebuild():
+    """Биты жанров и маски всех произведений после массовой загрузки."""
+    with transaction.atomic():
+        assign_bits()
+        refresh_masks()
+
+
+def filter_titles(queryset, genres, mode):
+    """
+    Произведения со всеми (ALL) или хотя бы одним (ANY) из жанров.
+    Жанры с битом проверяются одной побитовой операцией над маской,
+    без соединения с таблицей связей, поэтому строки не дублируются.
+    """
+    mask = 0
+    unmasked = []
+    for genre in genres:
+        if genre.mask_bit is None:
+            unmasked.append(genre)
+        else:
+            mask |= genre_bit(genre)
+    queryset = queryset.annotate(genre_match=F('genre_mask').bitand(mask))
+    if mode == ALL:
+        if mask:
+            queryset = queryset.filter(genre_match=mask)
+        for genre in unmasked:
+            queryset = queryset.filter(pk__in=GenreTitle.objects.filter(
+                genre=genre
+            ).values('title_id'))
+        return queryset
+    condition = Q(pk__in=GenreTitle.objects.filter(
+        genre__in=unmasked
+    ).values('title_id')) if unmasked else Q()
+    if mask:
+        condition |= Q(genre_match__gt=0)
+    return queryset.filter(condition) if condition else queryset.none()
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import LeaderboardEntry, Title
+
+# Байесовская оценка: средняя оценка, к которой добавлено
+# LEADERBOARD_PRIOR_COUNT воображаемых отзывов с оценкой
+# LEADERBOARD_PRIOR_MEAN. Произведения с парой отзывов остаются около
+# априорной оценки и не обгоняют произведения с сотнями отзывов.
+LEADERBOARD_PRIOR_MEAN = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 5.5)
+LEADERBOARD_PRIOR_COUNT = getattr(settings, 'LEADERBOARD_PRIOR_COUNT', 5)
+
+OVERALL = 'all'
+CATEGORY_PREFIX = 'category:'
+GENRE_PREFIX = 'genre:'
+# id произведения повторяется в запросе трижды, а число параметров
+# запроса в SQLite ограничено.
+REFRESH_BATCH_SIZE = 300
+
+GenreTitle = Title.genre.through
+
+# Строки всех рейтингов произведения собираются в базе одним запросом:
+# общий, по категории и по каждому жанру. В рейтинги попадают только
+# произведения с отзывами.
+SCORE_SQL = '(%s + t.rating_sum) / (%s + t.rating_count)'
+INSERT_SQL = '''
+INSERT INTO {entry} (board, title_id, score)
+SELECT %s, t.id, {score}
+FROM {title} t WHERE t.rating_count > 0 {where}
+UNION ALL
+SELECT %s || t.category_id, t.id, {score}
+FROM {title} t WHERE t.rating_count > 0 {where}
+UNION ALL
+SELECT %s || g.genre_id, t.id, {score}
+FROM {title} t JOIN {genre_title} g ON g.title_id = t.id
+WHERE t.rating_count > 0 {where}
+'''
+
+
+def category_board(category_id):
+    return f'{CATEGORY_PREFIX}{category_id}'
+
+
+def genre_board(genre_id):
+    return f'{GENRE_PREFIX}{genre_id}'
+
+
+def insert_entries(title_ids=None):
+    """Записывает строки рейтингов произведений (по умолчанию - всех)."""
+    quote = connection.ops.quote_name
+    where, id_params = '', []
+    if title_ids is not None:
+        where = 'AND t.id IN ({})'.format(', '.join(['%s'] * len(title_ids)))
+        id_params = list(title_ids)
+    prior = [
+        float(LEADERBOARD_PRIOR_MEAN * LEADERBOARD_PRIOR_COUNT),
+        float(LEADERBOARD_PRIOR_COUNT),
+    ]
+    params = []
+    for board in (OVERALL, CATEGORY_PREFIX, GENRE_PREFIX):
+        params.extend([board, *prior, *id_params])
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_SQL.format(
+            entry=quote(LeaderboardEntry._meta.db_table),
+            title=quote(Title._meta.db_table),
+            genre_title=quote(GenreTitle._meta.db_table),
+            score=SCORE_SQL,
+            where=where,
+        ), params)
+        return cursor.rowcount
+
+
+def refresh_titles(title_ids):
+    """Пересобирает строки перечисленных произведений во всех рейтингах."""
+    title_ids = list(title_ids)
+    with transaction.atomic():
+        for start in range(0, len(title_ids), REFRESH_BATCH_SIZE):
+            batch = title_ids[start:start + REFRESH_BATCH_SIZE]
+            LeaderboardEntry.objects.filter(title_id__in=batch).delete()
+            insert_entries(batch)
+
+
+def rebuild():
+    """Пересобирает все рейтинги. Возвращает количество строк."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        return insert_entries()
+
+
+def top_title_ids(board, limit):
+    """id лучших произведений рейтинга, читаются из leaderboard_top_idx."""
+    return list(
+        LeaderboardEntry.objects.filter(board=board).order_by(
+            '-score', 'title_id'
+        ).values_list('title_id', flat=True)[:limit]
+    )
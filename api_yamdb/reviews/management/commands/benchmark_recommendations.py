@@ -0,0 +1,85 @@
+import random
+import resource
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from reviews import recommendations
+
+
+def synthetic_ratings(reviews, users, titles, history, seed):
+    """
+    Оценки пользователей без базы: популярность произведений убывает по
+    закону Ципфа, число отзывов пользователя - по геометрическому.
+    """
+    generator = random.Random(seed)
+    weights = list(accumulate(1 / rank for rank in range(1, titles + 1)))
+    average = reviews / users
+    for _ in range(users):
+        count = min(
+            int(generator.expovariate(1 / average)) + 1, titles, history
+        )
+        title_ids = set(generator.choices(
+            range(titles), cum_weights=weights, k=count
+        ))
+        yield [
+            (title_id, generator.randint(1, 10)) for title_id in title_ids
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет расчёт похожих произведений на синтетических оценках, '
+        'не обращаясь к базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=10_000_000)
+        parser.add_argument('--users', type=int, default=200_000)
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument(
+            '--history', type=int,
+            default=recommendations.RECOMMENDATION_HISTORY
+        )
+        parser.add_argument(
+            '--neighbors', type=int,
+            default=recommendations.RECOMMENDATION_NEIGHBORS
+        )
+        parser.add_argument(
+            '--sample', type=int, default=0,
+            help=(
+                'Считать соседей только для стольких случайных произведений '
+                'и оценить полное время по ним (0 - для всех).'
+            )
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        matrix = recommendations.RatingMatrix(synthetic_ratings(
+            options['reviews'], options['users'], options['titles'],
+            options['history'], options['seed']
+        ))
+        loaded = time.monotonic()
+        columns = range(len(matrix.title_ids))
+        if options['sample']:
+            columns = random.Random(options['seed']).sample(
+                columns, min(options['sample'], len(columns))
+            )
+        for column in columns:
+            matrix.neighbors(column, options['neighbors'])
+        finished = time.monotonic()
+        total = (finished - loaded) * len(matrix.title_ids) / max(
+            len(columns), 1
+        )
+        self.stdout.write(
+            f'Оценок: {len(matrix.user_columns)}, '
+            f'пользователей: {len(matrix.user_ptr) - 1}, '
+            f'произведений: {len(matrix.title_ids)}\n'
+            f'Матрица: {loaded - started:.1f} с; соседи '
+            f'{len(columns)} произведений: {finished - loaded:.1f} с '
+            f'(все: ~{total:.0f} с)\n'
+            'Пиковая память процесса: '
+            f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} МБ'
+        )
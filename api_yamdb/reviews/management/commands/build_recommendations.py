@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import recommendations, stamps
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожие произведения по оценкам пользователей '
+        '(для /titles/<id>/similar/ и /users/me/recommendations/).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--neighbors',
+            type=int,
+            default=recommendations.RECOMMENDATION_NEIGHBORS,
+            help='Сколько соседей хранить для каждого произведения.'
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=recommendations.RECOMMENDATION_BLOCK_SIZE,
+            help=(
+                'Сколько произведений заменять в таблице соседей '
+                'одной транзакцией.'
+            )
+        )
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=recommendations.RECOMMENDATION_HISTORY,
+            help='Сколько последних отзывов пользователя учитывать.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=recommendations.RECOMMENDATION_CHUNK_SIZE,
+            help='Количество отзывов, читаемых из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = recommendations.build_neighbors(
+            neighbors=options['neighbors'],
+            block_size=options['block_size'],
+            chunk_size=options['chunk_size'],
+            history=options['history'],
+        )
+        stamps.bump(stamps.TITLES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано соседей: {created} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
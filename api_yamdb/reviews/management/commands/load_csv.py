@@ -0,0 +1,121 @@
+import csv
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews import genre_masks, search, stamps
+from reviews.catalog_cache import invalidate_catalog
+from reviews.catalog_sync import CatalogSync
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import CustomUser
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+# Порядок важен: каждая таблица ссылается только на загруженные выше.
+TABLES = (
+    ('users.csv', CustomUser, {}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': 'category_id'}),
+    ('genre_title.csv', Title.genre.through, {}),
+    ('review.csv', Review, {'author': 'author_id'}),
+    ('comments.csv', Comment, {'author': 'author_id'}),
+)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_rows(path, renames):
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            yield {renames.get(key, key): value for key, value in row.items()}
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов static/data в базу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DEFAULT_DATA_DIR,
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=(
+                'Синхронизировать каталог (category, genre, titles, '
+                'genre_title) со снимком без полной перезагрузки.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['upsert']:
+            sync = CatalogSync(options['path'], options['batch_size'])
+            sync.run()
+            for line in sync.report():
+                self.stdout.write(line)
+            return
+        for filename, model, renames in TABLES:
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{filename}: файл не найден, пропущен')
+                continue
+            loaded = self.load_table(
+                path, model, renames, options['batch_size']
+            )
+            self.stdout.write(f'{filename}: загружено строк {loaded}')
+        genre_masks.rebuild()
+        search.refresh_search_columns()
+        invalidate_catalog()
+        stamps.bump(stamps.EPOCH)
+        call_command('recount_ratings', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
+
+    @staticmethod
+    def build(model, row):
+        obj = model(**row)
+        if model is CustomUser:
+            obj.set_unusable_password()
+        return obj
+
+    def load_table(self, path, model, renames, batch_size):
+        rows = read_rows(path, renames)
+        loaded = 0
+        with transaction.atomic(), keep_auto_now_add(model):
+            while True:
+                batch = [
+                    self.build(model, row)
+                    for row in islice(rows, batch_size)
+                ]
+                if not batch:
+                    break
+                model.objects.bulk_create(batch, batch_size=batch_size)
+                loaded += len(batch)
+        return loaded
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews import leaderboards, stamps
+from reviews.models import RATING_FIELDS, Review, Title, rating_aggregates
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сохранённые счётчики рейтинга и гистограммы оценок '
+        'произведений и их места в рейтингах лучших.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество произведений, пересчитываемых за одну транзакцию.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        title_ids = Title.objects.order_by('pk').values_list('pk', flat=True)
+        last_id = 0
+        fixed = 0
+        while True:
+            chunk = list(title_ids.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+            fixed += self.recount_chunk(chunk)
+        if fixed:
+            stamps.bump(stamps.EPOCH)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено произведений: {fixed}')
+        )
+
+    @staticmethod
+    def recount_chunk(title_ids):
+        with transaction.atomic():
+            totals = {
+                row.pop('title_id'): row
+                for row in Review.objects.filter(
+                    title_id__in=title_ids
+                ).order_by().values('title_id').annotate(
+                    **rating_aggregates()
+                )
+            }
+            empty = dict.fromkeys(RATING_FIELDS, 0)
+            changed = []
+            for title in Title.objects.select_for_update().filter(
+                pk__in=title_ids
+            ).only(*RATING_FIELDS):
+                expected = totals.get(title.pk, empty)
+                if any(
+                    getattr(title, field) != expected[field]
+                    for field in RATING_FIELDS
+                ):
+                    for field in RATING_FIELDS:
+                        setattr(title, field, expected[field])
+                    changed.append(title)
+            Title.objects.bulk_update(changed, RATING_FIELDS)
+            leaderboards.refresh_titles(title.pk for title in changed)
+        return len(changed)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from reviews import leaderboards, stamps
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает рейтинги лучших произведений: общий, по категориям '
+        'и по жанрам.'
+    )
+
+    def handle(self, *args, **options):
+        created = leaderboards.rebuild()
+        stamps.bump(stamps.TITLES)
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано мест в рейтингах: {created}')
+        )
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+# На SQLite изменение колонок reviews_title пересоздаёт таблицу вместе с
+# триггерами, поэтому такие миграции восстанавливают их через
+# restore_triggers().
+TRIGGERS_SQL = [
+    "CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, {}, {}); "
+    "END".format(FOLD.format('new.name'), FOLD.format('new.description')),
+    "CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    "description) VALUES ('delete', old.id, {}, {}); "
+    "END".format(FOLD.format('old.name'), FOLD.format('old.description')),
+    "CREATE TRIGGER reviews_title_fts_update "
+    "AFTER UPDATE OF name, description ON reviews_title "
+    "BEGIN "
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, "
+    "description) VALUES ('delete', old.id, {}, {}); "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, {}, {}); "
+    "END".format(
+        FOLD.format('old.name'), FOLD.format('old.description'),
+        FOLD.format('new.name'), FOLD.format('new.description')
+    ),
+]
+
+DROP_TRIGGERS_SQL = [
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+]
+
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE reviews_title_fts USING fts5("
+    "name, description, content='', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "SELECT id, {}, {} FROM reviews_title".format(
+        FOLD.format('name'), FOLD.format('description')
+    ),
+    *TRIGGERS_SQL,
+]
+
+DROP_SQL = [
+    *DROP_TRIGGERS_SQL,
+    'DROP TABLE IF EXISTS reviews_title_fts',
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def restore_triggers():
+    """Операция, заново создающая триггеры поискового индекса."""
+    return run_sqlite(DROP_TRIGGERS_SQL + TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
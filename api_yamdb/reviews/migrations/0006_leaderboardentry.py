@@ -0,0 +1,70 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:58
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Формат рейтингов и оценка на момент миграции (reviews.leaderboards).
+PRIOR_MEAN = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 5.5)
+PRIOR_COUNT = getattr(settings, 'LEADERBOARD_PRIOR_COUNT', 5)
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    genres = defaultdict(list)
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+        'title_id', 'genre_id'
+    ):
+        genres[title_id].append(genre_id)
+    entries = []
+    for pk, category_id, rating_sum, rating_count in Title.objects.filter(
+        rating_count__gt=0
+    ).values_list('pk', 'category_id', 'rating_sum', 'rating_count'):
+        score = (PRIOR_MEAN * PRIOR_COUNT + rating_sum) / (
+            PRIOR_COUNT + rating_count
+        )
+        boards = [
+            'all',
+            f'category:{category_id}',
+            *(f'genre:{genre_id}' for genre_id in genres[pk]),
+        ]
+        entries.extend(
+            LeaderboardEntry(board=board, title_id=pk, score=score)
+            for board in boards
+        )
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=80, verbose_name='Рейтинг')),
+                ('score', models.FloatField(verbose_name='Байесовская оценка')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', '-score', 'title'], name='leaderboard_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'title'), name='unique_leaderboard_entry'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
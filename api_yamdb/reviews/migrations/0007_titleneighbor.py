@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleNeighbor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField(verbose_name='Сходство')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Похожее произведение')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Похожее произведение',
+                'verbose_name_plural': 'Похожие произведения',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleneighbor',
+            index=models.Index(fields=['title', '-similarity'], name='title_neighbor_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleneighbor',
+            constraint=models.UniqueConstraint(fields=('title', 'neighbor'), name='unique_title_neighbor'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:06
+
+from importlib import import_module
+
+import django.core.validators
+from django.db import migrations, models
+
+search_index = import_module('reviews.migrations.0004_title_search_index')
+
+GENRE_MASK_BITS = 63
+
+
+def fill_genre_masks(apps, schema_editor):
+    Genre = apps.get_model('reviews', 'Genre')
+    Title = apps.get_model('reviews', 'Title')
+    genres = list(Genre.objects.order_by('pk')[:GENRE_MASK_BITS])
+    for bit, genre in enumerate(genres):
+        genre.mask_bit = bit
+    Genre.objects.bulk_update(genres, ['mask_bit'])
+    masks = {}
+    for title_id, bit in Title.genre.through.objects.filter(
+        genre__mask_bit__isnull=False
+    ).values_list('title_id', 'genre__mask_bit'):
+        masks[title_id] = masks.get(title_id, 0) | 1 << bit
+    Title.objects.bulk_update(
+        [Title(pk=pk, genre_mask=mask) for pk, mask in masks.items()],
+        ['genre_mask'],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_titleneighbor'),
+    ]
+
+    operations = [
+        # При откате RemoveField пересоздаёт таблицу и теряет триггеры.
+        migrations.RunPython(
+            migrations.RunPython.noop, search_index.restore_triggers()
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='mask_bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, validators=[django.core.validators.MaxValueValidator(62)], verbose_name='Бит в маске жанров'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='genre_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска жанров'),
+        ),
+        migrations.RunPython(
+            search_index.restore_triggers(), migrations.RunPython.noop
+        ),
+        migrations.RunPython(fill_genre_masks, migrations.RunPython.noop),
+    ]
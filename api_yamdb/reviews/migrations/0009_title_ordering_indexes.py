@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:08
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+search_index = import_module('reviews.migrations.0004_title_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_genre_mask'),
+    ]
+
+    operations = [
+        # AlterField в SQLite пересоздаёт таблицу и теряет триггеры.
+        migrations.RunPython(
+            migrations.RunPython.noop, search_index.restore_triggers()
+        ),
+        migrations.AlterModelOptions(
+            name='title',
+            options={'ordering': ('-year', '-id'), 'verbose_name': 'Произведение', 'verbose_name_plural': 'Произведения'},
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='titles', to='reviews.Category', verbose_name='Категория'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year', 'id'], name='title_category_idx'),
+        ),
+        migrations.RunPython(
+            search_index.restore_triggers(), migrations.RunPython.noop
+        ),
+    ]
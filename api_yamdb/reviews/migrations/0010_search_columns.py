@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:10
+
+import re
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module('reviews.migrations.0004_title_search_index')
+
+SPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_search_text(text):
+    # Нормализация reviews.search на момент миграции.
+    return SPACE_PATTERN.sub(' ', text.casefold().replace('ё', 'е')).strip()
+
+
+def fill_search_columns(apps, schema_editor):
+    for model_name in ('Title', 'Genre', 'Category'):
+        model = apps.get_model('reviews', model_name)
+        max_length = model._meta.get_field('name_search').max_length
+        objs = list(model.objects.only('name'))
+        for obj in objs:
+            obj.name_search = normalize_search_text(obj.name)[:max_length]
+        model.objects.bulk_update(objs, ['name_search'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_ordering_indexes'),
+    ]
+
+    operations = [
+        # При откате RemoveField пересоздаёт таблицу и теряет триггеры.
+        migrations.RunPython(
+            migrations.RunPython.noop, search_index.restore_triggers()
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='name_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=80, verbose_name='Название для поиска'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=80, verbose_name='Название для поиска'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=80, verbose_name='Название для поиска'),
+        ),
+        migrations.RunPython(
+            search_index.restore_triggers(), migrations.RunPython.noop
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,57 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
 
 from users.models import CustomUser
 
 MAX_LENGTH_NAME = 80
 MAX_LENGTH_SLUG = 25
 
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
+
+def histogram_field(score):
+    """Поле Title с количеством отзывов с оценкой score."""
+    return f'score_{score}'
+
+
+HISTOGRAM_FIELDS = tuple(map(histogram_field, SCORES))
+# Счётчики Title, которые ведутся по отзывам.
+RATING_FIELDS = ('rating_sum', 'rating_count', *HISTOGRAM_FIELDS)
+# Бит 63 у знакового 64-битного целого - знак, поэтому жанров с битом в
+# маске Title.genre_mask не больше 63 (см. reviews.genre_masks).
+GENRE_MASK_BITS = 63
+# Поля Title, которые меняются только запросами UPDATE по отзывам и жанрам.
+COUNTER_FIELDS = (*RATING_FIELDS, 'genre_mask')
+TITLE_ORDERING = ('-year', '-id')
+
+
+def rating_aggregates():
+    """Агрегаты по отзывам для пересчёта RATING_FIELDS."""
+    return {
+        'rating_sum': Coalesce(Sum('score'), 0),
+        'rating_count': Count('id'),
+        **{
+            histogram_field(score): Count('id', filter=Q(score=score))
+            for score in SCORES
+        },
+    }
+
 
 class Category(models.Model):
     """Модель категорий."""
     name = models.CharField('Название', max_length=MAX_LENGTH_NAME)
     slug = models.SlugField(max_length=MAX_LENGTH_SLUG, unique=True)
+    name_search = models.CharField(
+        'Название для поиска',
+        max_length=MAX_LENGTH_NAME,
+        db_index=True,
+        editable=False,
+        default=''
+    )
 
     def __str__(self):
         return self.name
@@ -32,6 +73,23 @@ class Genre(models.Model):
         max_length=MAX_LENGTH_SLUG,
         unique=True)
 
+    name_search = models.CharField(
+        'Название для поиска',
+        max_length=MAX_LENGTH_NAME,
+        db_index=True,
+        editable=False,
+        default=''
+    )
+
+    mask_bit = models.PositiveSmallIntegerField(
+        'Бит в маске жанров',
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        validators=[MaxValueValidator(GENRE_MASK_BITS - 1)]
+    )
+
     def __str__(self):
         return self.name
 
@@ -44,23 +102,89 @@ class Title(models.Model):
     """Модель произведений (фильмы/книги/музыка)."""
 
     name = models.CharField('Название', max_length=MAX_LENGTH_NAME)
+    # Нормализованное название (reviews.search) для поиска по префиксу.
+    name_search = models.CharField(
+        'Название для поиска',
+        max_length=MAX_LENGTH_NAME,
+        db_index=True,
+        editable=False,
+        default=''
+    )
     year = models.IntegerField('Год выпуска')
     description = models.TextField('Описание')
+    # Отдельный индекс не нужен: category_id - начало title_category_idx.
     category = models.ForeignKey(
         Category, related_name='titles', on_delete=models.PROTECT,
-        verbose_name='Категория'
+        verbose_name='Категория', db_index=False
     )
     genre = models.ManyToManyField(
         Genre, related_name='titles', verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+    genre_mask = models.BigIntegerField(
+        'Маска жанров', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Порядок страниц списка: индексы ниже отдают строки уже
+        # упорядоченными, и без фильтра, и с фильтром по категории и годам.
+        ordering = TITLE_ORDERING
+        indexes = [
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(
+                fields=['category', 'year', 'id'], name='title_category_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        # Полное сохранение загруженного ранее экземпляра (API, админка)
+        # не записывает счётчики: иначе устаревшие значения из памяти
+        # затёрли бы отзывы и жанры, добавленные после его загрузки.
+        if update_fields is None and not (
+            force_insert or self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+    @property
+    def rating(self):
+        """Средняя оценка по сохранённым счётчикам отзывов."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_histogram(self):
+        """Количество отзывов с каждой оценкой от MIN_SCORE до MAX_SCORE."""
+        return {
+            score: getattr(self, histogram_field(score)) for score in SCORES
+        }
+
 
 class Review(models.Model):
     """Модель отзывов."""
@@ -81,8 +205,8 @@ class Review(models.Model):
         'Оценка',
         default=0,
         validators=[
-            MaxValueValidator(10),
-            MinValueValidator(1)
+            MaxValueValidator(MAX_SCORE),
+            MinValueValidator(MIN_SCORE)
         ],
     )
     pub_date = models.DateTimeField(
@@ -105,6 +229,12 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Счётчики рейтинга обновляются в post_save, поэтому запись отзыва
+        # и пересчёт должны попасть в одну транзакцию.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель для хранения комментариев."""
@@ -133,3 +263,76 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Строка материализованного рейтинга лучших произведений (см.
+    reviews.leaderboards). Рейтинги: общий, по категории и по жанру.
+    """
+    board = models.CharField('Рейтинг', max_length=MAX_LENGTH_NAME)
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField('Байесовская оценка')
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'title'],
+                name='unique_leaderboard_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['board', '-score', 'title'],
+                name='leaderboard_top_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.board}: {self.title_id}'
+
+
+class TitleNeighbor(models.Model):
+    """
+    Похожее произведение: сосед по скорректированному косинусному
+    сходству оценок (см. reviews.recommendations).
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='neighbors',
+        verbose_name='Произведение'
+    )
+    neighbor = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожее произведение'
+    )
+    similarity = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'neighbor'],
+                name='unique_title_neighbor'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['title', '-similarity'],
+                name='title_neighbor_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} ~ {self.neighbor_id}'
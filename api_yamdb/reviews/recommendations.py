@@ -0,0 +1,221 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Review, Title, TitleNeighbor
+
+# Сходство двух произведений - косинус между их столбцами матрицы оценок
+# пользователь × произведение, из которых вычтена средняя оценка каждого
+# пользователя (скорректированное косинусное сходство). build_neighbors
+# сохраняет для каждого произведения не больше RECOMMENDATION_NEIGHBORS
+# соседей с положительным сходством; ответы API читают только TitleNeighbor.
+RECOMMENDATION_NEIGHBORS = getattr(settings, 'RECOMMENDATION_NEIGHBORS', 20)
+# Сколько произведений заменяется в TitleNeighbor одной транзакцией.
+RECOMMENDATION_BLOCK_SIZE = getattr(
+    settings, 'RECOMMENDATION_BLOCK_SIZE', 5000
+)
+RECOMMENDATION_CHUNK_SIZE = getattr(
+    settings, 'RECOMMENDATION_CHUNK_SIZE', 10000
+)
+# Сколько последних отзывов пользователя учитывать в сходстве и в его
+# рекомендациях. Расчёт сходства растёт как сумма квадратов числа отзывов
+# пользователей, и ограничение не даёт немногим активным авторам
+# занять его целиком.
+RECOMMENDATION_HISTORY = getattr(settings, 'RECOMMENDATION_HISTORY', 200)
+
+
+def user_ratings(chunk_size, history):
+    """
+    Оценки пользователей одним проходом по отзывам: для каждого автора
+    не больше history последних пар (title_id, оценка).
+    """
+    rows = Review.objects.order_by('author_id', '-pub_date').values_list(
+        'author_id', 'title_id', 'score'
+    ).iterator(chunk_size=chunk_size)
+    for _, group in groupby(rows, key=itemgetter(0)):
+        yield [
+            (title_id, score) for _, title_id, score in islice(group, history)
+        ]
+
+
+class RatingMatrix:
+    """
+    Центрированная разреженная матрица оценок в двух видах: по строкам
+    пользователей и по столбцам произведений. Номера столбцов, номера строк
+    и отклонения от средней оценки пользователя лежат в массивах array,
+    по 8 байт на оценку в каждом виде. Нулевые отклонения на сходство не
+    влияют и не хранятся.
+    """
+
+    def __init__(self, ratings):
+        self.title_ids = []
+        columns = {}
+        user_ptr = array('l', [0])
+        user_columns = array('i')
+        user_deviations = array('f')
+        for row in ratings:
+            mean = sum(score for _, score in row) / len(row)
+            for title_id, score in row:
+                if score == mean:
+                    continue
+                column = columns.get(title_id)
+                if column is None:
+                    column = columns[title_id] = len(self.title_ids)
+                    self.title_ids.append(title_id)
+                user_columns.append(column)
+                user_deviations.append(score - mean)
+            if len(user_columns) > user_ptr[-1]:
+                user_ptr.append(len(user_columns))
+        self.columns = columns
+        self.user_ptr = user_ptr
+        self.user_columns = user_columns
+        self.user_deviations = user_deviations
+        self.transpose()
+
+    def transpose(self):
+        """Столбцы произведений и их длины по строкам пользователей."""
+        counts = [0] * len(self.title_ids)
+        for column in self.user_columns:
+            counts[column] += 1
+        title_ptr = array('l', [0])
+        for count in counts:
+            title_ptr.append(title_ptr[-1] + count)
+        size = len(self.user_columns)
+        title_users = array('i', bytes(4 * size))
+        title_deviations = array('f', bytes(4 * size))
+        position = array('l', title_ptr[:-1])
+        squares = [0.0] * len(self.title_ids)
+        for user in range(len(self.user_ptr) - 1):
+            for index in range(self.user_ptr[user], self.user_ptr[user + 1]):
+                column = self.user_columns[index]
+                deviation = self.user_deviations[index]
+                title_users[position[column]] = user
+                title_deviations[position[column]] = deviation
+                position[column] += 1
+                squares[column] += deviation * deviation
+        self.title_ptr = title_ptr
+        self.title_users = title_users
+        self.title_deviations = title_deviations
+        self.norms = [math.sqrt(total) for total in squares]
+
+    def neighbors(self, column, limit):
+        """
+        limit пар (сходство, столбец) с наибольшим положительным сходством.
+        Скалярные произведения копятся только для одного столбца: по
+        пользователям, оценившим его, и их строкам.
+        """
+        user_ptr = self.user_ptr
+        user_columns = self.user_columns
+        user_deviations = self.user_deviations
+        dots = defaultdict(float)
+        for index in range(self.title_ptr[column], self.title_ptr[column + 1]):
+            user = self.title_users[index]
+            weight = self.title_deviations[index]
+            start, end = user_ptr[user], user_ptr[user + 1]
+            for other, deviation in zip(
+                user_columns[start:end], user_deviations[start:end]
+            ):
+                dots[other] += weight * deviation
+        dots.pop(column, None)
+        norm = self.norms[column]
+        return heapq.nlargest(limit, (
+            (dot / (norm * self.norms[other]), other)
+            for other, dot in dots.items() if dot > 0
+        ))
+
+    def title_neighbors(self, title_id, limit):
+        """Соседи произведения для TitleNeighbor."""
+        column = self.columns.get(title_id)
+        if column is None:
+            return
+        for similarity, other in self.neighbors(column, limit):
+            yield TitleNeighbor(
+                title_id=title_id, neighbor_id=self.title_ids[other],
+                similarity=similarity
+            )
+
+
+def build_neighbors(neighbors=RECOMMENDATION_NEIGHBORS,
+                    block_size=RECOMMENDATION_BLOCK_SIZE,
+                    chunk_size=RECOMMENDATION_CHUNK_SIZE,
+                    history=RECOMMENDATION_HISTORY):
+    """
+    Читает отзывы одним проходом и пересчитывает соседей всех
+    произведений. Соседи заменяются блоками по block_size произведений,
+    каждый в своей транзакции. Возвращает количество записанных соседей.
+    """
+    matrix = RatingMatrix(user_ratings(chunk_size, history))
+    title_ids = Title.objects.order_by('pk').values_list('pk', flat=True)
+    created = 0
+    last_id = 0
+    while True:
+        block = list(title_ids.filter(pk__gt=last_id)[:block_size])
+        if not block:
+            break
+        last_id = block[-1]
+        rows = [
+            row for title_id in block
+            for row in matrix.title_neighbors(title_id, neighbors)
+        ]
+        with transaction.atomic():
+            TitleNeighbor.objects.filter(title_id__in=block).delete()
+            created += len(TitleNeighbor.objects.bulk_create(
+                rows, batch_size=chunk_size
+            ))
+    return created
+
+
+def similar_title_ids(title_id, limit):
+    """id похожих произведений, читаются из title_neighbor_idx."""
+    return list(
+        TitleNeighbor.objects.filter(title_id=title_id).order_by(
+            '-similarity', 'neighbor_id'
+        ).values_list('neighbor_id', flat=True)[:limit]
+    )
+
+
+def recommended_title_ids(user, limit):
+    """
+    Непросмотренные произведения, оценку которых пользователь, судя по
+    соседям его последних отзывов, поставил бы выше своей средней.
+
+    Два запроса по индексам (отзывы автора и соседи из
+    title_neighbor_idx) и сложение не больше RECOMMENDATION_HISTORY ×
+    RECOMMENDATION_NEIGHBORS строк. Готовые рекомендации каждого
+    пользователя не хранятся: их пересчёт для всех авторов стоил бы
+    build_recommendations больше, чем сам расчёт соседей.
+    """
+    reviews = list(
+        Review.objects.filter(author=user).order_by('-pub_date').values_list(
+            'title_id', 'score'
+        )
+    )
+    history = dict(reviews[:RECOMMENDATION_HISTORY])
+    if not history:
+        return []
+    # Отзывы старше истории тоже исключают произведение из рекомендаций.
+    reviewed = {title_id for title_id, _ in reviews}
+    mean = sum(history.values()) / len(history)
+    weighted = defaultdict(float)
+    weights = defaultdict(float)
+    for title_id, neighbor_id, similarity in TitleNeighbor.objects.filter(
+        title_id__in=list(history)
+    ).values_list('title_id', 'neighbor_id', 'similarity'):
+        if neighbor_id in reviewed:
+            continue
+        weighted[neighbor_id] += similarity * (history[title_id] - mean)
+        weights[neighbor_id] += similarity
+    predictions = (
+        (weighted[title_id] / weights[title_id], title_id)
+        for title_id in weighted
+        if weighted[title_id] > 0
+    )
+    return [
+        title_id for _, title_id in heapq.nlargest(limit, predictions)
+    ]
@@ -0,0 +1,107 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from users.models import CustomUser
+from .models import Category, Genre, Title
+
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+WORD_PATTERN = re.compile(r'\w+')
+SPACE_PATTERN = re.compile(r'\s+')
+
+# Теневые колонки с нормализованным текстом: модель, исходное поле,
+# колонка. Их заполняет сигнал pre_save, после массовой загрузки -
+# refresh_search_columns. Поиск и фильтры сравнивают с ними
+# нормализованный запрос, поэтому не зависят от того, умеет ли база
+# сравнивать кириллицу без учёта регистра.
+SEARCH_COLUMNS = {
+    Title: ('name', 'name_search'),
+    Genre: ('name', 'name_search'),
+    Category: ('name', 'name_search'),
+    CustomUser: ('username', 'username_search'),
+}
+# Больше любого символа: строки с префиксом p лежат в [p, p + PREFIX_END).
+PREFIX_END = '\U0010ffff'
+
+
+def normalize_search_text(text):
+    """Приводит текст к виду, в котором он лежит в поисковом индексе."""
+    return SPACE_PATTERN.sub(' ', text.casefold().replace('ё', 'е')).strip()
+
+
+def search_column_value(model, text):
+    _, column = SEARCH_COLUMNS[model]
+    max_length = model._meta.get_field(column).max_length
+    return normalize_search_text(text)[:max_length]
+
+
+def fill_search_column(instance):
+    source, column = SEARCH_COLUMNS[type(instance)]
+    setattr(instance, column, search_column_value(
+        type(instance), getattr(instance, source)
+    ))
+
+
+def refresh_search_columns(batch_size=1000):
+    """Заполняет теневые колонки строк, записанных в обход сигналов."""
+    with transaction.atomic():
+        for model, (source, column) in SEARCH_COLUMNS.items():
+            changed = []
+            for pk, text, current in model.objects.order_by('pk').values_list(
+                'pk', source, column
+            ).iterator():
+                value = search_column_value(model, text)
+                if value != current:
+                    changed.append(model(pk=pk, **{column: value}))
+            model.objects.bulk_update(changed, [column], batch_size)
+
+
+def prefix_lookup(column, text):
+    """Поиск по префиксу как диапазон значений: читается из индекса."""
+    prefix = normalize_search_text(text)
+    return {f'{column}__gte': prefix, f'{column}__lt': prefix + PREFIX_END}
+
+
+def contains_lookup(column, text):
+    return {f'{column}__contains': normalize_search_text(text)}
+
+
+def build_match_query(text):
+    """
+    Собирает безопасный запрос FTS5: каждое слово ищется по префиксу,
+    все слова должны встретиться в документе.
+    """
+    words = WORD_PATTERN.findall(normalize_search_text(text))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по полнотекстовому индексу и ранжирует их."""
+    match_query = build_match_query(text)
+    if not match_query:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    # Подзапрос через extra: RawSQL внутри __in SQLite считает скалярным.
+    return queryset.extra(
+        where=[
+            f'"reviews_title"."id" IN (SELECT rowid FROM {TITLE_SEARCH_TABLE} '
+            f'WHERE {TITLE_SEARCH_TABLE} MATCH %s)'
+        ],
+        params=[match_query],
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT bm25({TITLE_SEARCH_TABLE}, %s, %s) '
+            f'FROM {TITLE_SEARCH_TABLE} '
+            f'WHERE {TITLE_SEARCH_TABLE} MATCH %s '
+            f'AND rowid = "reviews_title"."id"',
+            (NAME_WEIGHT, DESCRIPTION_WEIGHT, match_query)
+        )
+    ).order_by('search_rank', 'id')
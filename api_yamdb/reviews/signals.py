@@ -0,0 +1,240 @@
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_migrate, post_save, pre_save)
+from django.dispatch import receiver
+
+from users.models import CustomUser
+from . import genre_masks, leaderboards, search, stamps
+from .catalog_cache import (category_cache, genre_cache, invalidate_catalog,
+                            related_index, title_autocomplete)
+from .models import (Category, Comment, Genre, LeaderboardEntry, Review,
+                     Title, histogram_field, rating_aggregates)
+
+
+def change_rating(title_id, added=None, removed=None):
+    """
+    Атомарно сдвигает счётчики рейтинга и гистограмму произведения:
+    added - появившаяся оценка, removed - исчезнувшая.
+    """
+    histogram = Counter()
+    if added is not None:
+        histogram[added] += 1
+    if removed is not None:
+        histogram[removed] -= 1
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + (added or 0) - (removed or 0),
+        rating_count=F('rating_count') + sum(histogram.values()),
+        **{
+            histogram_field(score): F(histogram_field(score)) + delta
+            for score, delta in histogram.items() if delta
+        }
+    )
+    leaderboards.refresh_titles([title_id])
+    reviews = sum(histogram.values())
+    if reviews:
+        transaction.on_commit(
+            partial(title_autocomplete.shift_reviews, title_id, reviews)
+        )
+    stamps.bump(stamps.TITLES, stamps.title_stamp(title_id))
+
+
+def recount_rating(title_id):
+    """Пересчитывает счётчики произведения по таблице отзывов."""
+    Title.objects.filter(pk=title_id).update(
+        **Review.objects.filter(title_id=title_id).aggregate(
+            **rating_aggregates()
+        )
+    )
+    leaderboards.refresh_titles([title_id])
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    # Отложенные поля (.only/.defer) не читаем, чтобы не делать запрос.
+    instance._rating_state = (
+        instance.__dict__.get('title_id'),
+        instance.__dict__.get('score'),
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    old_title_id, old_score = instance._rating_state
+    if created:
+        change_rating(instance.title_id, added=instance.score)
+    elif old_title_id is None or old_score is None:
+        recount_rating(instance.title_id)
+    elif old_title_id != instance.title_id:
+        change_rating(old_title_id, removed=old_score)
+        change_rating(instance.title_id, added=instance.score)
+    elif old_score != instance.score:
+        change_rating(
+            instance.title_id, added=instance.score, removed=old_score
+        )
+    instance._rating_state = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    old_title_id, old_score = instance._rating_state
+    if old_title_id is None or old_score is None:
+        recount_rating(instance.title_id)
+    else:
+        change_rating(old_title_id, removed=old_score)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_cache(sender, **kwargs):
+    genre_cache.invalidate()
+    transaction.on_commit(genre_cache.invalidate)
+    stamps.bump(stamps.GENRES)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    category_cache.invalidate()
+    transaction.on_commit(category_cache.invalidate)
+    stamps.bump(stamps.CATEGORIES)
+
+
+@receiver(post_migrate)
+def invalidate_catalog_after_migrate(sender, **kwargs):
+    # flush и migrate меняют таблицы в обход сигналов моделей.
+    invalidate_catalog()
+    stamps.bump(stamps.EPOCH)
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_leaderboards(sender, instance, created, **kwargs):
+    # У нового произведения нет отзывов, в рейтинги ему рано.
+    if not created:
+        leaderboards.refresh_titles([instance.pk])
+
+
+@receiver(pre_save, sender=Title)
+@receiver(pre_save, sender=Genre)
+@receiver(pre_save, sender=Category)
+def fill_search_column(sender, instance, **kwargs):
+    search.fill_search_column(instance)
+
+
+@receiver(pre_save, sender=Genre)
+def assign_genre_bit(sender, instance, **kwargs):
+    if instance._state.adding and instance.mask_bit is None:
+        bits = genre_masks.free_bits()
+        if bits:
+            instance.mask_bit = bits[0]
+
+
+@receiver(post_delete, sender=Genre)
+def clear_genre_bit(sender, instance, **kwargs):
+    # Связи удалены каскадом без m2m_changed; бит может достаться
+    # новому жанру.
+    if instance.mask_bit is not None:
+        genre_masks.refresh_masks(
+            genre_masks.titles_with_bit(instance.mask_bit)
+        )
+
+
+@receiver(post_delete, sender=Genre)
+def drop_genre_leaderboard(sender, instance, **kwargs):
+    LeaderboardEntry.objects.filter(
+        board=leaderboards.genre_board(instance.pk)
+    ).delete()
+
+
+def invalidate_related_index():
+    related_index.invalidate()
+    transaction.on_commit(related_index.invalidate)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+def invalidate_related_titles(sender, **kwargs):
+    invalidate_related_index()
+
+
+@receiver(post_save, sender=Title)
+def update_title_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(partial(title_autocomplete.put, instance))
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_autocomplete(sender, instance, **kwargs):
+    # После удаления pk у instance обнуляется.
+    transaction.on_commit(partial(title_autocomplete.remove, instance.pk))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def bump_title_stamps(sender, instance, **kwargs):
+    stamps.bump(
+        stamps.TITLES, stamps.TITLE_LIST, stamps.title_stamp(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_review_stamps(sender, instance, **kwargs):
+    stamps.bump(
+        stamps.TITLES,
+        stamps.title_stamp(instance.title_id),
+        stamps.review_stamp(instance.pk),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_stamps(sender, instance, **kwargs):
+    stamps.bump(stamps.review_stamp(instance.review_id))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_title_genres(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if not action.startswith('post_'):
+        return
+    invalidate_related_index()
+    if not reverse:
+        title_ids = [instance.pk]
+    elif pk_set is not None:
+        title_ids = pk_set
+    else:
+        # clear() со стороны жанра не сообщает затронутые произведения.
+        if instance.mask_bit is not None:
+            genre_masks.refresh_masks(
+                genre_masks.titles_with_bit(instance.mask_bit)
+            )
+        LeaderboardEntry.objects.filter(
+            board=leaderboards.genre_board(instance.pk)
+        ).delete()
+        stamps.bump(stamps.EPOCH)
+        return
+    genre_masks.refresh_masks(title_ids)
+    leaderboards.refresh_titles(title_ids)
+    stamps.bump(
+        stamps.TITLES, stamps.TITLE_LIST, *map(stamps.title_stamp, title_ids)
+    )
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_stamped_username(sender, instance, **kwargs):
+    instance._stamped_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_user_stamps(sender, instance, created, **kwargs):
+    # Из полей пользователя в отзывы и комментарии попадает только имя
+    # автора. У нового пользователя их ещё нет, а удаление каскадом
+    # удаляет их вместе с метками.
+    username = instance.__dict__.get('username')
+    if not created and username != instance._stamped_username:
+        stamps.bump(stamps.USERS)
+    instance._stamped_username = username
@@ -0,0 +1,58 @@
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+STAMPS_CACHE_ALIAS = getattr(settings, 'STAMPS_CACHE_ALIAS', 'default')
+
+# Метка, которую сдвигают массовые операции в обход сигналов моделей.
+EPOCH = 'epoch'
+TITLES = 'titles'
+# Состав списков произведений: меняется при создании, удалении и
+# изменении полей, по которым фильтруют, но не при новых отзывах.
+TITLE_LIST = 'title_list'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+USERS = 'users'
+
+
+def title_stamp(title_id):
+    return f'title:{title_id}'
+
+
+def review_stamp(review_id):
+    return f'review:{review_id}'
+
+
+def stamp_key(name):
+    return f'stamp:{name}'
+
+
+def new_stamp():
+    return uuid4().hex, int(time.time())
+
+
+def get_stamps(names):
+    """
+    Метки версий (токен, время изменения) для перечисленных имён.
+    Пропавшие из кеша метки создаются заново.
+    """
+    stamps_cache = caches[STAMPS_CACHE_ALIAS]
+    keys = [stamp_key(name) for name in names]
+    stamps = stamps_cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in stamps}
+    if missing:
+        stamps_cache.set_many(missing, None)
+        stamps.update(missing)
+    return [stamps[key] for key in keys]
+
+
+def bump(*names):
+    """Сдвигает метки после фиксации текущей транзакции."""
+    def apply():
+        caches[STAMPS_CACHE_ALIAS].set_many(
+            {stamp_key(name): new_stamp() for name in names}, None
+        )
+    transaction.on_commit(apply)
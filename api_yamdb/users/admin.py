@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from users.models import CustomUser
+from users.models import CustomUser, OutgoingEmail
 
 
 class CustomUserAdmin(UserAdmin):
@@ -35,3 +35,17 @@ class CustomUserAdmin(UserAdmin):
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
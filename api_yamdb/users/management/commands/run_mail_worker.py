@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import outbox
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutgoingEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=outbox.MAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем, выбираемых из очереди за раз.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help='Пауза в секундах между проверками пустой очереди.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = outbox.drain(options['batch_size'])
+            except OSError as error:
+                self.stderr.write(f'Почтовый сервер недоступен: {error}')
+            else:
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено писем: {sent}, отложено: {failed}'
+                    )
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
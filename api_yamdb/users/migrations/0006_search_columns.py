@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:10
+
+import re
+
+from django.db import migrations, models
+
+SPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_search_text(text):
+    # Нормализация reviews.search на момент миграции.
+    return SPACE_PATTERN.sub(' ', text.casefold().replace('ё', 'е')).strip()
+
+
+def fill_search_column(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    users = list(CustomUser.objects.only('username'))
+    for user in users:
+        user.username_search = normalize_search_text(user.username)
+    CustomUser.objects.bulk_update(users, ['username_search'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='username_search',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150, verbose_name='Имя пользователя для поиска'),
+        ),
+        migrations.RunPython(fill_search_column, migrations.RunPython.noop),
+    ]
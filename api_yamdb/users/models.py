@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import ASCIIUsernameValidator
 from django.db import models
+from django.utils import timezone
 
 from .managers import CustomUserManager
 
@@ -67,9 +68,23 @@ class CustomUser(AbstractUser):
             'unique': UNIQUE_USERNAME_ERORR,
         },
     )
+    # Нормализованное имя (reviews.search) для поиска по префиксу.
+    username_search = models.CharField(
+        'Имя пользователя для поиска',
+        max_length=USERNAME_FIELD_MAX_LENGTH,
+        db_index=True,
+        editable=False,
+        default='',
+    )
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Растёт при смене роли и прав: токены со старой версией недействительны.
+    auth_version = models.PositiveIntegerField(
+        'Версия прав',
+        default=0,
+        editable=False,
+    )
 
     @property
     def is_admin(self):
@@ -86,3 +101,38 @@ class CustomUser(AbstractUser):
 
     class Meta:
         ordering = ['-date_joined']
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (см. manage.py run_mail_worker)."""
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField(
+        'Отправитель',
+        max_length=EMAIL_FIELD_MAX_LENGTH,
+    )
+    recipient = models.EmailField(
+        'Получатель',
+        max_length=EMAIL_FIELD_MAX_LENGTH,
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='outgoing_email_due_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
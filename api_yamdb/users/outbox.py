@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+MAIL_OUTBOX_BATCH_SIZE = getattr(settings, 'MAIL_OUTBOX_BATCH_SIZE', 100)
+MAIL_OUTBOX_MAX_ATTEMPTS = getattr(settings, 'MAIL_OUTBOX_MAX_ATTEMPTS', 5)
+# Пауза перед повтором удваивается с каждой попыткой: 30 с, 60 с, 120 с...
+MAIL_OUTBOX_BACKOFF = getattr(settings, 'MAIL_OUTBOX_BACKOFF', 30)
+MAIL_OUTBOX_MAX_BACKOFF = getattr(settings, 'MAIL_OUTBOX_MAX_BACKOFF', 3600)
+# Отправлять письмо сразу после фиксации транзакции, не дожидаясь
+# воркера. Удобно для разработки и тестов.
+MAIL_OUTBOX_EAGER = getattr(settings, 'MAIL_OUTBOX_EAGER', False)
+
+DELIVERY_FIELDS = ('attempts', 'sent_at', 'next_attempt_at', 'last_error')
+
+
+def enqueue(subject, body, recipient, from_email=None):
+    """Ставит письмо в очередь в текущей транзакции."""
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+    if MAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver([email]))
+    return email
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(
+        MAIL_OUTBOX_BACKOFF * 2 ** (attempts - 1), MAIL_OUTBOX_MAX_BACKOFF
+    ))
+
+
+def due_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=timezone.now(),
+        attempts__lt=MAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def reopen(connection):
+    """Переоткрывает соединение после сбоя; ошибка будет у следующего."""
+    try:
+        connection.close()
+        connection.open()
+    except OSError:
+        pass
+
+
+def deliver(emails, connection=None):
+    """
+    Отправляет письма по одному через общее соединение и сохраняет
+    результат. Неудачные попытки откладываются с растущей паузой.
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    connection = connection or get_connection()
+    sent = failed = 0
+    for email in emails:
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.recipient],
+            connection=connection,
+        )
+        email.attempts += 1
+        try:
+            message.send()
+        except Exception as error:
+            # Любая ошибка письма (и, например, BadHeaderError) только
+            # откладывает его: иначе пропал бы учёт попыток всей пачки, а
+            # воркер падал бы на этом письме после каждого перезапуска.
+            email.last_error = f'{type(error).__name__}: {error}'
+            email.next_attempt_at = timezone.now() + backoff(email.attempts)
+            failed += 1
+            if isinstance(error, OSError):
+                reopen(connection)
+        else:
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            sent += 1
+    OutgoingEmail.objects.bulk_update(emails, DELIVERY_FIELDS)
+    return sent, failed
+
+
+def drain(batch_size=MAIL_OUTBOX_BATCH_SIZE):
+    """
+    Отправляет все готовые к отправке письма пачками по batch_size через
+    одно соединение. Рассчитана на один воркер.
+    """
+    sent = failed = 0
+    batch = list(due_emails()[:batch_size])
+    if not batch:
+        return sent, failed
+    with get_connection() as connection:
+        while batch:
+            batch_sent, batch_failed = deliver(batch, connection)
+            sent += batch_sent
+            failed += batch_failed
+            batch = list(due_emails()[:batch_size])
+    return sent, failed
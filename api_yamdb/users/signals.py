@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, \
+    pre_save
+from django.dispatch import receiver
+
+from reviews import search
+from .models import CustomUser
+from .tokens import AUTH_FIELDS, forget_auth_version
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_auth_state(sender, instance, **kwargs):
+    # Отложенные поля (.only/.defer) не читаем, чтобы не делать запрос.
+    instance._auth_state = tuple(
+        instance.__dict__.get(field) for field in AUTH_FIELDS
+    )
+
+
+@receiver(pre_save, sender=CustomUser)
+def bump_auth_version(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding:
+        return
+    # Сравниваются только поля, которые действительно будут записаны.
+    changed = any(
+        instance.__dict__.get(field) != old
+        for field, old in zip(AUTH_FIELDS, instance._auth_state)
+        if update_fields is None or field in update_fields
+    )
+    if not changed:
+        return
+    instance.auth_version += 1
+    if update_fields is not None and 'auth_version' not in update_fields:
+        # update_fields неизменяем, поэтому версия записывается отдельно.
+        CustomUser.objects.filter(pk=instance.pk).update(
+            auth_version=F('auth_version') + 1
+        )
+
+
+@receiver(post_save, sender=CustomUser)
+def reset_auth_state(sender, instance, **kwargs):
+    remember_auth_state(sender, instance)
+    transaction.on_commit(lambda: forget_auth_version(instance.pk))
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_deleted_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_auth_version(user_id))
+
+
+@receiver(pre_save, sender=CustomUser)
+def fill_username_search(sender, instance, **kwargs):
+    search.fill_search_column(instance)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import CustomUser
+
+AUTH_VERSION_CACHE_ALIAS = getattr(
+    settings, 'AUTH_VERSION_CACHE_ALIAS', 'default'
+)
+# Сколько секунд хранится закешированная версия прав. Изменение прав
+# сбрасывает её сразу, если кеш общий для процессов сервера; с кешем
+# процесса другие процессы заметят его только через это время.
+AUTH_VERSION_CACHE_TIMEOUT = getattr(
+    settings, 'AUTH_VERSION_CACHE_TIMEOUT', 30
+)
+# Поля, изменение которых отзывает выданные пользователю токены. Имя
+# пользователя тоже попадает в claims: после переименования старый токен
+# не должен представляться ни этим, ни другим пользователем.
+AUTH_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+# Версия прав удалённого или заблокированного пользователя.
+REVOKED = -1
+
+
+def version_key(user_id):
+    return f'auth_version:{user_id}'
+
+
+def get_auth_version(user_id):
+    """Текущая версия прав пользователя или REVOKED."""
+    cache = caches[AUTH_VERSION_CACHE_ALIAS]
+    version = cache.get(version_key(user_id))
+    if version is None:
+        row = CustomUser.objects.filter(pk=user_id).values_list(
+            'auth_version', 'is_active'
+        ).first()
+        version = row[0] if row is not None and row[1] else REVOKED
+        cache.set(version_key(user_id), version, AUTH_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_auth_version(user_id):
+    caches[AUTH_VERSION_CACHE_ALIAS].delete(version_key(user_id))
+
+
+def access_token_for(user):
+    """Токен доступа с ролью и флагами прав пользователя в claims."""
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['auth_version'] = user.auth_version
+    return token
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,3 +35,19 @@ assert get_version() < '3.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def eager_mail_outbox(monkeypatch):
+    """Письма из очереди отправляются сразу, без воркера."""
+    from users import outbox
+    monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', True)
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    """Каждый тест начинается с полными корзинами ограничителей."""
+    from django.core.cache import caches
+    from api.v1 import throttling
+    throttling.bucket_store.reset()
+    caches[throttling.THROTTLE_CACHE_ALIAS].clear()
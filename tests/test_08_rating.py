@@ -0,0 +1,45 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] == 4, (
+            'Проверьте, что `rating` произведения равен средней оценке отзывов'
+        )
+        auth_client(user).patch(
+            f'{url}reviews/{reviews[1]["id"]}/', data={'score': 9}
+        )
+        assert client.get(url).json()['rating'] == 6, (
+            'Проверьте, что `rating` пересчитывается при изменении оценки'
+        )
+        auth_client(moderator).delete(f'{url}reviews/{reviews[2]["id"]}/')
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что `rating` пересчитывается при удалении отзыва'
+        )
+        user.delete()
+        assert client.get(url).json()['rating'] == 5, (
+            'Проверьте, что `rating` пересчитывается при каскадном удалении'
+        )
+        admin.delete()
+        assert client.get(url).json()['rating'] is None, (
+            'Проверьте, что `rating` без отзывов равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recount_ratings_command(self, client, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('recount_ratings', chunk_size=1)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `recount_ratings` восстанавливает счётчики'
+        )
@@ -0,0 +1,33 @@
+import pytest
+
+from .common import create_titles
+
+TITLES_LIST_QUERIES = 3
+TITLE_DETAIL_QUERIES = 2
+
+
+class Test09TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_constant_queries(self, client, admin_client,
+                                        django_assert_num_queries):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        source = Title.objects.get(pk=titles[0]['id'])
+        for number in range(30):
+            title = Title.objects.create(
+                name=f'Копия {number}', year=2000,
+                description='', category=source.category
+            )
+            title.genre.set(source.genre.all())
+
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            response = client.get('/api/v1/titles/?limit=100')
+        assert len(response.json()['results']) == 32, (
+            'Проверьте, что `/api/v1/titles/` возвращает все произведения'
+        )
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            client.get('/api/v1/titles/?limit=5')
+        with django_assert_num_queries(TITLE_DETAIL_QUERIES):
+            client.get(f'/api/v1/titles/{source.pk}/')
@@ -0,0 +1,71 @@
+import pytest
+from django.utils import timezone
+
+from reviews.models import Comment, Review
+from .common import create_comments
+
+
+class Test10CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, {'pagination': 'cursor', 'limit': 2})
+        data = response.json()
+        assert 'count' not in data and len(data['results']) == 2, (
+            'Проверьте, что `?pagination=cursor` включает курсорный режим'
+        )
+        assert data['next'] and data['previous'] is None, (
+            'Проверьте, что курсорный режим возвращает ссылку `next`'
+        )
+        data_next = client.get(data['next']).json()
+        ids = [review['id'] for review in data['results'] + data_next['results']]
+        assert sorted(ids) == sorted(review['id'] for review in reviews), (
+            'Проверьте, что страницы курсора покрывают все отзывы без повторов'
+        )
+        assert data_next['next'] is None and data_next['previous'], (
+            'Проверьте, что последняя страница курсора не содержит `next`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor_and_offset(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        data = client.get(url, {'pagination': 'cursor'}).json()
+        assert len(data['results']) == len(comments), (
+            'Проверьте курсорный режим для `/comments/`'
+        )
+        data = client.get(url, {'limit': 1, 'offset': 1}).json()
+        assert data['count'] == len(comments) and len(data['results']) == 1, (
+            'Проверьте, что limit/offset по-прежнему работает для `/comments/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_equal_pub_dates(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        Comment.objects.bulk_create(
+            Comment(review=review, author=admin, text=str(number))
+            for number in range(1200)
+        )
+        comments = review.comments.all()
+        comments.update(pub_date=timezone.now())
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{review.pk}/comments/')
+        data = client.get(url, {'pagination': 'cursor', 'limit': 100}).json()
+        pages, ids = [data], [item['id'] for item in data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data)
+            ids += [item['id'] for item in data['results']]
+        assert ids == sorted(comments.values_list('id', flat=True),
+                             reverse=True), (
+            'Проверьте, что курсор листает записи с одинаковым `pub_date` '
+            'по id без пропусков и повторов'
+        )
+        data = client.get(pages[-1]['previous']).json()
+        assert data['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу'
+        )
@@ -0,0 +1,36 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test11TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_titles(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'name': 'Ёлка', 'description': 'Проект под Новый год'}
+        )
+        data = client.get('/api/v1/titles/?search=ЕЛКА').json()
+        assert [title['id'] for title in data['results']] == [titles[0]['id']], (
+            'Проверьте, что `?search=` учитывает регистр кириллицы и букву ё'
+        )
+        data = client.get('/api/v1/titles/?search=проект').json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что совпадения в названии ранжируются выше описания'
+        )
+        assert data['count'] == 2, (
+            'Проверьте число найденных произведений в `count`'
+        )
+        data = client.get('/api/v1/titles/?search=драм').json()
+        assert [title['id'] for title in data['results']] == [titles[1]['id']], (
+            'Проверьте, что `?search=` ищет по префиксу слова'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        data = client.get('/api/v1/titles/?search=проект').json()
+        assert data['count'] == 1, (
+            'Проверьте, что поисковый индекс обновляется при удалении'
+        )
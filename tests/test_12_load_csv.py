@@ -0,0 +1,112 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+DATA_DIR = Path(__file__).parents[1] / 'api_yamdb' / 'static' / 'data'
+
+
+class Test12LoadCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_static_data(self, client):
+        from reviews.models import Comment, Review, Title
+
+        call_command('load_csv', batch_size=7)
+        assert Title.objects.count() == 32, (
+            'Проверьте, что `load_csv` загружает все произведения'
+        )
+        assert Title.objects.get(pk=1).genre.exists(), (
+            'Проверьте, что `load_csv` загружает связи произведений и жанров'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `load_csv` сохраняет даты из файла'
+        )
+        assert Comment.objects.exists(), (
+            'Проверьте, что `load_csv` загружает комментарии'
+        )
+        data = client.get('/api/v1/titles/1/').json()
+        assert data['rating'] is not None, (
+            'Проверьте, что после `load_csv` пересчитывается рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_upsert_catalog(self, tmp_path):
+        from reviews.models import Category, Genre, Title
+
+        call_command('load_csv')
+        for filename in ('category.csv', 'genre.csv'):
+            (tmp_path / filename).write_text(
+                (DATA_DIR / filename).read_text(encoding='utf-8'),
+                encoding='utf-8'
+            )
+        links = (DATA_DIR / 'genre_title.csv').read_text(encoding='utf-8')
+        (tmp_path / 'genre_title.csv').write_text(
+            links.rstrip('\n') + '\n43,33,1\n', encoding='utf-8'
+        )
+        titles = (DATA_DIR / 'titles.csv').read_text(encoding='utf-8')
+        titles = titles.replace('1,Побег из Шоушенка,1994,1',
+                                '1,Побег из Шоушенка,1995,1')
+        titles = '\n'.join(
+            line for line in titles.splitlines()
+            if not line.startswith('32,')
+        )
+        (tmp_path / 'titles.csv').write_text(
+            titles + '\n33,Новинка,2022,2\n', encoding='utf-8'
+        )
+        output = StringIO()
+        call_command('load_csv', upsert=True, path=str(tmp_path),
+                     stdout=output)
+        assert 'reviews_title: добавлено 1, обновлено 1, удалено 1' in (
+            output.getvalue()
+        ), (
+            'Проверьте отчёт `load_csv --upsert` о добавленных, '
+            'обновлённых и удалённых строках'
+        )
+        assert Title.objects.get(pk=1).year == 1995
+        assert not Title.objects.filter(pk=32).exists()
+        new_title = Title.objects.get(pk=33)
+        assert new_title.category.slug == 'book'
+        assert new_title.name_search == 'новинка', (
+            'Проверьте, что `--upsert` заполняет поисковую колонку'
+        )
+        assert new_title.genre_mask == 1 << Genre.objects.get(
+            slug='drama'
+        ).mask_bit, (
+            'Проверьте, что `--upsert` пересчитывает маску жанров '
+            'затронутых произведений'
+        )
+        assert Category.objects.count() == 3 and Genre.objects.count() == 15
+        assert Title.objects.get(pk=1).rating is not None, (
+            'Проверьте, что `load_csv --upsert` не сбрасывает рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_noop_upsert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews import stamps
+
+        call_command('load_csv')
+        epoch = stamps.get_stamps([stamps.EPOCH])
+        with CaptureQueriesContext(connection) as context:
+            call_command('load_csv', upsert=True, path=str(DATA_DIR),
+                         stdout=StringIO())
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        assert not writes, (
+            'Проверьте, что `load_csv --upsert` без изменений в снимке '
+            f'ничего не записывает в базу: {writes[:3]}'
+        )
+        assert not any(
+            'users_customuser' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что `--upsert` не перечитывает пользователей'
+        assert stamps.get_stamps([stamps.EPOCH]) == epoch, (
+            'Проверьте, что `load_csv --upsert` без изменений не сбрасывает '
+            'ETag и кеш ответов'
+        )
@@ -0,0 +1,49 @@
+import csv
+import json
+
+import pytest
+
+from .common import create_comments
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode('utf-8')
+
+
+class Test13Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_permissions(self, client, user_client):
+        assert client.get('/api/v1/export/titles/').status_code == 401
+        assert user_client.get('/api/v1/export/titles/').status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_ndjson_and_csv(self, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        response = admin_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == sorted(
+            review['id'] for review in reviews
+        ), (
+            'Проверьте, что `/api/v1/export/reviews/` выгружает все отзывы'
+        )
+        assert rows[0]['author__username'] == admin.username
+
+        response = admin_client.get('/api/v1/export/titles/?output=csv')
+        rows = list(csv.reader(read_stream(response).splitlines()))
+        assert rows[0][:3] == ['id', 'name', 'year']
+        assert len(rows) == len(titles) + 1
+
+        response = admin_client.get(
+            '/api/v1/export/comments/?since=2999-01-01'
+        )
+        assert read_stream(response) == '', (
+            'Проверьте фильтр `since` по дате публикации'
+        )
+        response = admin_client.get('/api/v1/export/comments/?since=2000-01-01')
+        assert len(read_stream(response).splitlines()) == len(comments)
+        response = admin_client.get('/api/v1/export/comments/?since=вчера')
+        assert response.status_code == 400
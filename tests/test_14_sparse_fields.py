@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews
+
+
+class Test14SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fields(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        title = response.json()['results'][0]
+        assert set(title) == {'id', 'name', 'rating'}, (
+            'Проверьте, что `?fields=` оставляет в ответе только '
+            'перечисленные поля'
+        )
+        assert len(queries) == 2, (
+            'Проверьте, что без поля `genre` жанры не подгружаются'
+        )
+        assert 'description' not in queries[-1]['sql'], (
+            'Проверьте, что `?fields=` сужает список колонок в запросе'
+        )
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/?fields=genre,unknown'
+        )
+        assert list(response.json()) == ['genre']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_users_fields(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/?fields=id,score'
+        )
+        assert all(
+            set(review) == {'id', 'score'}
+            for review in response.json()['results']
+        )
+        response = admin_client.get('/api/v1/users/?fields=username')
+        assert all(
+            list(user) == ['username'] for user in response.json()['results']
+        )
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            '?fields=id',
+            data={'text': 'Новый текст'}
+        )
+        assert response.json()['text'] == 'Новый текст', (
+            'Проверьте, что `?fields=` не влияет на изменяющие запросы'
+        )
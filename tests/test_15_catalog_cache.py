@@ -0,0 +1,57 @@
+import pytest
+
+from .common import create_genre
+
+
+class Test15CatalogCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_from_cache(self, client, admin_client,
+                                  django_assert_num_queries):
+        genres = create_genre(admin_client)
+        client.get('/api/v1/genres/')
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/genres/?search=драма')
+        assert response.json()['results'] == [genres[2]], (
+            'Проверьте, что список жанров и поиск отдаются из кеша'
+        )
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драмеди', 'slug': 'dramedy'}
+        )
+        response = client.get('/api/v1/genres/?search=драм')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что кеш жанров сбрасывается при создании жанра'
+        )
+        admin_client.delete('/api/v1/genres/dramedy/')
+        response = client.get('/api/v1/genres/')
+        assert response.json()['count'] == len(genres), (
+            'Проверьте, что кеш жанров сбрасывается при удалении жанра'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_slugs_from_cache(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        genres = create_genre(admin_client)
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        admin_client.get('/api/v1/categories/')
+        data = {'name': 'Поворот', 'year': 2000, 'category': 'films',
+                'genre': [genre['slug'] for genre in genres],
+                'description': 'Описание'}
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert not any(
+            'WHERE "reviews_genre"."slug"' in query['sql']
+            or 'WHERE "reviews_category"."slug"' in query['sql']
+            for query in queries
+        ), (
+            'Проверьте, что slug жанров и категорий при создании '
+            'произведения ищутся в кеше'
+        )
+        data['genre'] = ['unknown']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400
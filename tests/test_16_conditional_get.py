@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+from reviews import stamps
+from .common import auth_client, create_reviews, create_titles
+
+
+class Test16ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_not_modified(self, client, admin_client,
+                                    django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            'Проверьте, что список произведений отдаёт ETag и Last-Modified'
+        )
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag возвращается статус 304 '
+            'без запросов к базе'
+        )
+        assert client.get('/api/v1/titles/?limit=1')['ETag'] != etag, (
+            'Проверьте, что ETag зависит от параметров запроса'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Новое'}
+        )
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет ETag списка'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_and_reviews(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        detail = f'/api/v1/titles/{titles[0]["id"]}/'
+        other = f'/api/v1/titles/{titles[1]["id"]}/'
+        detail_etag = client.get(detail)['ETag']
+        other_etag = client.get(other)['ETag']
+        reviews_etag = client.get(f'{detail}reviews/')['ETag']
+        auth_client(user).patch(
+            f'{detail}reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        assert client.get(
+            detail, HTTP_IF_NONE_MATCH=detail_etag
+        ).status_code == 200, (
+            'Проверьте, что изменение отзыва меняет ETag произведения'
+        )
+        assert client.get(
+            f'{detail}reviews/', HTTP_IF_NONE_MATCH=reviews_etag
+        ).status_code == 200
+        assert client.get(
+            other, HTTP_IF_NONE_MATCH=other_etag
+        ).status_code == 304, (
+            'Проверьте, что отзыв на одно произведение не меняет ETag другого'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_genres_if_modified_since(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/genres/')
+        response = client.get(
+            '/api/v1/genres/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == 304, (
+            'Проверьте поддержку If-Modified-Since для списка жанров'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_user_changes(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'newcomer', 'email': 'newcomer@yamdb.fake'}
+        )
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'О себе'}
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что регистрация и изменение профиля не меняют ETag '
+            'отзывов'
+        )
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что смена имени автора меняет ETag отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_stamps_shared_between_processes(self):
+        script = (
+            'import django; django.setup(); '
+            'from reviews import stamps; '
+            'print(stamps.get_stamps([stamps.TITLES])[0][0])'
+        )
+        stamps.bump(stamps.TITLES)
+        token = stamps.get_stamps([stamps.TITLES])[0][0]
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings'},
+        )
+        assert result.stdout.strip() == token, (
+            'Проверьте, что метки версий видны другим процессам сервера'
+        )
+
+    def test_07_many_stamps_kept(self):
+        names = [stamps.title_stamp(number) for number in range(1000)]
+        before = stamps.get_stamps(names)
+        assert stamps.get_stamps(names) == before, (
+            'Проверьте, что метки версий не вытесняются из кеша, когда их '
+            'больше 300'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_leading_zero_ids(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[1]['id']
+        detail = f'/api/v1/titles/0{title_id}/'
+        comments = f'{detail}reviews/0{review_id}/comments/'
+        etag = client.get(detail)['ETag']
+        client.get(comments)
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Новое название'}
+        )
+        response = client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `/titles/0<id>/` сверяется с меткой того же '
+            'произведения, что и `/titles/<id>/`'
+        )
+        assert response.json()['name'] == 'Новое название'
+        auth_client(user).post(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            data={'text': 'Комментарий'}
+        )
+        assert len(client.get(comments).json()['results']) == 1, (
+            'Проверьте, что новый комментарий сбрасывает кеш ответа '
+            'для `/reviews/0<id>/comments/`'
+        )
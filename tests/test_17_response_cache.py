@@ -0,0 +1,130 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.v1.views import TitleViewSet
+from reviews.models import Review
+from .common import auth_client, create_reviews
+
+
+class Test17ResponseCache:
+
+    def check_precise_invalidation(self, client, admin_client, admin,
+                                   django_assert_num_queries):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        first = f'/api/v1/titles/{titles[0]["id"]}/'
+        second = f'/api/v1/titles/{titles[1]["id"]}/'
+        urls = (first, second, f'{first}reviews/', f'{second}reviews/',
+                f'/api/v1/titles/?year={2020}', '/api/v1/titles/')
+        for url in urls:
+            client.get(url)
+        for url in urls:
+            with django_assert_num_queries(0):
+                assert client.get(url).status_code == 200, (
+                    'Проверьте, что анонимные GET-запросы отдаются из кеша'
+                )
+        client.get('/api/v1/titles/?offset=0&year=2020&limit=10')
+        with django_assert_num_queries(0):
+            client.get('/api/v1/titles/?limit=10&year=2020&offset=0')
+
+        auth_client(user).patch(
+            f'{first}reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        for url in (first, f'{first}reviews/', '/api/v1/titles/'):
+            assert client.get(url).json() != {}
+        with django_assert_num_queries(0):
+            client.get(second)
+            client.get(f'{second}reviews/')
+            client.get('/api/v1/titles/?year=2020')
+        assert client.get(first).json()['rating'] == 6, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_locmem_cache(self, client, admin_client, admin,
+                             django_assert_num_queries):
+        self.check_precise_invalidation(
+            client, admin_client, admin, django_assert_num_queries
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_file_cache(self, client, admin_client, admin, tmp_path,
+                           django_assert_num_queries):
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'versions': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'versions',
+            },
+            'responses': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            },
+        }
+        with override_settings(CACHES=caches):
+            self.check_precise_invalidation(
+                client, admin_client, admin, django_assert_num_queries
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_authenticated_not_cached(self, admin_client, admin):
+        create_reviews(admin_client, admin)
+        admin_client.get('/api/v1/titles/')
+        with CaptureQueriesContext(connection) as queries:
+            admin_client.get('/api/v1/titles/')
+        assert any('reviews_title' in query['sql'] for query in queries), (
+            'Проверьте, что ответы авторизованным пользователям не кешируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_change_during_handler(self, client, admin_client, admin,
+                                      monkeypatch):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        paginate_queryset = TitleViewSet.paginate_queryset
+
+        def paginate_then_change(view, queryset):
+            page = paginate_queryset(view, queryset)
+            monkeypatch.setattr(
+                TitleViewSet, 'paginate_queryset', paginate_queryset
+            )
+            review = Review.objects.get(pk=reviews[0]['id'])
+            review.score = 10
+            review.save()
+            return page
+
+        monkeypatch.setattr(
+            TitleViewSet, 'paginate_queryset', paginate_then_change
+        )
+        client.get('/api/v1/titles/')
+        title = next(
+            title for title in client.get('/api/v1/titles/').json()['results']
+            if title['id'] == titles[0]['id']
+        )
+        expected = admin_client.get(f'/api/v1/titles/{title["id"]}/').json()
+        assert title['rating'] == expected['rating'], (
+            'Проверьте, что изменение, пришедшее во время чтения данных, '
+            'не закрепляется в кеше ответов под новыми метками'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_empty_filtered_list(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        urls = ('/api/v1/titles/?year=1990', '/api/v1/titles/?genre=rock',
+                '/api/v1/titles/?search=Старое')
+        for url in urls:
+            assert client.get(url).json()['count'] == 0
+        admin_client.post('/api/v1/genres/', data={
+            'name': 'Рок', 'slug': 'rock'
+        })
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={
+            'name': 'Старое', 'year': 1990, 'genre': ['rock']
+        })
+        for url in urls:
+            assert client.get(url).json()['count'] == 1, (
+                f'Проверьте, что пустой отфильтрованный список `{url}` '
+                'обновляется после изменения произведения'
+            )
@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connections
+from rest_framework import mixins
+from rest_framework.test import APIClient
+
+from api.v1 import response_cache
+from reviews import stamps
+
+from .common import create_titles
+
+THREADS = 8
+
+
+class Test18SingleFlight:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_one_recomputation(self, admin_client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        original = mixins.RetrieveModelMixin.retrieve
+        calls = []
+
+        def slow_retrieve(view, request, *args, **kwargs):
+            calls.append(1)
+            time.sleep(0.3)
+            return original(view, request, *args, **kwargs)
+
+        monkeypatch.setattr(
+            mixins.RetrieveModelMixin, 'retrieve', slow_retrieve
+        )
+        barrier = threading.Barrier(THREADS)
+
+        def fetch(_):
+            barrier.wait()
+            try:
+                return APIClient().get(url)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            responses = list(executor.map(fetch, range(THREADS)))
+
+        assert all(response.status_code == 200 for response in responses), (
+            'Проверьте, что все одновременные запросы получают ответ'
+        )
+        assert all(
+            response.json() == responses[0].json() for response in responses
+        )
+        assert len(calls) == 1, (
+            'Проверьте, что при одновременных запросах к произведению '
+            'ответ пересчитывается только один раз'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_stale_while_revalidate(self, monkeypatch):
+        key = 'response:test-stale'
+        cache = response_cache.response_cache()
+        tokens = response_cache.read_tokens([stamps.EPOCH])
+        response_cache.store(key, tokens, {'value': 'old'}, 0.1)
+        entry = cache.get(key)
+        entry['expires_at'] = time.time() - 1
+        cache.set(key, entry)
+        assert cache.add(f'{key}:lock', True)
+
+        def compute():
+            raise AssertionError('Ответ пересчитывается без блокировки')
+
+        monkeypatch.setattr(
+            response_cache, 'RESPONSE_CACHE_STALE_WHILE_REVALIDATE', 30
+        )
+        assert response_cache.single_flight(key, compute).data == {
+            'value': 'old'
+        }, (
+            'Проверьте, что пока ответ пересчитывается, остальным отдаётся '
+            'устаревшая запись'
+        )
+
+        monkeypatch.setattr(
+            response_cache, 'RESPONSE_CACHE_STALE_WHILE_REVALIDATE', 0
+        )
+        monkeypatch.setattr(response_cache, 'RESPONSE_CACHE_WAIT', 0.1)
+        with pytest.raises(AssertionError):
+            response_cache.single_flight(key, compute)
+        cache.delete_many([key, f'{key}:lock'])
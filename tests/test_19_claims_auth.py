@@ -0,0 +1,146 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from users import tokens
+from .common import create_users_api
+
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+def token_client(user):
+    response = APIClient().post(URL_TOKEN, data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 200
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client
+
+
+class Test19ClaimsAuth:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_query(self, admin_client, django_assert_num_queries):
+        user, moderator = create_users_api(admin_client)
+        moderator.role = 'admin'
+        moderator.save()
+        client = token_client(moderator)
+        client.get('/api/v1/categories/')
+        # Только проверка уникальности slug и вставка категории.
+        with django_assert_num_queries(2):
+            response = client.post(
+                '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+            )
+        assert response.status_code == 201, (
+            'Проверьте, что администратор из claims токена может создавать '
+            'категории без запроса пользователя из базы'
+        )
+        response = token_client(user).post(
+            '/api/v1/categories/', data={'name': 'Игры', 'slug': 'games'}
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_token(self, admin_client):
+        user, _ = create_users_api(admin_client)
+        client = token_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные пользователю токены'
+        )
+        user.refresh_from_db()
+        assert token_client(user).get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что новый токен содержит новую роль'
+        )
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'О себе'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        client = token_client(user)
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Снова о себе'}
+        )
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что изменение полей, не связанных с правами, '
+            'не отзывает токены'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_deleted_user(self, admin_client):
+        user, _ = create_users_api(admin_client)
+        client = token_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя недействителен'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rename_revokes_token(self, admin_client):
+        user, moderator = create_users_api(admin_client)
+        client = token_client(user)
+        old_name = user.username
+        response = client.patch(
+            '/api/v1/users/me/', data={'username': 'renamed'}
+        )
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена имени пользователя отзывает его токены'
+        )
+        admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'username': old_name}
+        )
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Чужое'})
+        assert response.status_code == 401
+        moderator.refresh_from_db()
+        assert moderator.bio != 'Чужое', (
+            'Проверьте, что старый токен не даёт доступа к профилю '
+            'пользователя, занявшего освободившееся имя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_update_fields_revokes_token(self, admin_client):
+        user, _ = create_users_api(admin_client)
+        client = token_client(user)
+        user.role = 'admin'
+        user.save(update_fields=['role'])
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена роли через save(update_fields=...) '
+            'отзывает токены'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_version_forgotten_in_other_processes(self, admin_client):
+        user, _ = create_users_api(admin_client)
+        version = tokens.get_auth_version(user.pk)
+        script = (
+            'import django; django.setup(); '
+            'from users import tokens; '
+            f'tokens.forget_auth_version({user.pk})'
+        )
+        subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings'},
+        )
+        cache = caches[tokens.AUTH_VERSION_CACHE_ALIAS]
+        assert cache.get(tokens.version_key(user.pk)) is None, (
+            'Проверьте, что версия прав, сброшенная одним процессом сервера '
+            'при смене роли, не остаётся в кеше других'
+        )
+        assert tokens.get_auth_version(user.pk) == version
@@ -0,0 +1,188 @@
+import socketserver
+import threading
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from users import outbox
+from users.models import OutgoingEmail
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает всё и запоминает письма."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 go on')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(raw)
+                self.server.messages.append(b''.join(data))
+            self.reply('250 ok')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """Первые failures отправок падают с ошибкой соединения."""
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionRefusedError('relay down')
+        return super().send_messages(messages)
+
+
+def enqueue_many(count):
+    for number in range(count):
+        outbox.enqueue('Тема', f'Письмо {number}', f'user{number}@yamdb.fake')
+
+
+class Test20MailOutbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues(self, client, monkeypatch):
+        monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', False)
+        response = client.post(URL_SIGNUP, data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо сама, '
+            'а ставит его в очередь'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'valid@yamdb.fake'
+
+        call_command('run_mail_worker', '--once')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что run_mail_worker отправляет письма из очереди'
+        )
+        assert 'Код подтверждения' in mail.outbox[0].body
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+        call_command('run_mail_worker', '--once')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @override_settings(EMAIL_BACKEND='tests.test_20_mail_outbox.FlakyBackend')
+    def test_02_retry_with_backoff(self, monkeypatch):
+        monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', False)
+        enqueue_many(2)
+        FlakyBackend.failures = 1
+        assert outbox.drain() == (1, 1)
+        failed = OutgoingEmail.objects.get(sent_at__isnull=True)
+        assert failed.attempts == 1 and 'relay down' in failed.last_error
+        assert failed.next_attempt_at > timezone.now() + timedelta(
+            seconds=outbox.MAIL_OUTBOX_BACKOFF - 5
+        ), 'Проверьте, что повторная попытка откладывается'
+        assert outbox.drain() == (0, 0)
+
+        failed.next_attempt_at = timezone.now()
+        failed.save()
+        FlakyBackend.failures = 1
+        assert outbox.drain() == (0, 1)
+        failed.refresh_from_db()
+        assert failed.next_attempt_at > timezone.now() + timedelta(
+            seconds=2 * outbox.MAIL_OUTBOX_BACKOFF - 5
+        ), 'Проверьте, что пауза между попытками растёт'
+
+        failed.next_attempt_at = timezone.now()
+        failed.save()
+        assert outbox.drain() == (1, 0)
+        assert len(mail.outbox) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_file_backend(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', False)
+        enqueue_many(3)
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+            EMAIL_FILE_PATH=str(tmp_path),
+        ):
+            assert outbox.drain() == (3, 0)
+        written = ''.join(path.read_text() for path in tmp_path.iterdir())
+        for number in range(3):
+            assert f'user{number}@yamdb.fake' in written
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_smtp_connection_reused(self, monkeypatch, smtp_server):
+        monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', False)
+        enqueue_many(5)
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=smtp_server.server_address[1],
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        ):
+            call_command('run_mail_worker', '--once', '--batch-size', '2')
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.connections == 1, (
+            'Проверьте, что воркер отправляет все пачки через одно '
+            'SMTP-соединение'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_bad_message(self, monkeypatch):
+        monkeypatch.setattr(outbox, 'MAIL_OUTBOX_EAGER', False)
+        enqueue_many(2)
+        OutgoingEmail.objects.filter(recipient='user0@yamdb.fake').update(
+            subject='Тема\nBcc: victim@yamdb.fake'
+        )
+        assert outbox.drain() == (1, 1), (
+            'Проверьте, что ошибка одного письма не останавливает отправку '
+            'остальных'
+        )
+        bad = OutgoingEmail.objects.get(sent_at__isnull=True)
+        assert bad.attempts == 1 and 'BadHeaderError' in bad.last_error, (
+            'Проверьте, что попытка неотправляемого письма учитывается'
+        )
+        for _ in range(outbox.MAIL_OUTBOX_MAX_ATTEMPTS):
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            outbox.drain()
+        bad.refresh_from_db()
+        assert bad.attempts == outbox.MAIL_OUTBOX_MAX_ATTEMPTS
+        assert outbox.drain() == (0, 0)
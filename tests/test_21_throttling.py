@@ -0,0 +1,89 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.v1 import throttling
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+class Test21Throttling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_per_username(self, django_assert_num_queries):
+        client = APIClient()
+        capacity, _ = throttling.parse_rate(
+            throttling.TokenBucketThrottle.rates['token_username']
+        )
+        data = {'username': 'victim', 'confirmation_code': 'guess'}
+        for _ in range(capacity):
+            assert client.post(URL_TOKEN, data=data).status_code == 404
+        with django_assert_num_queries(0):
+            response = client.post(URL_TOKEN, data=data)
+        assert response.status_code == 429, (
+            'Проверьте, что подбор кода для одного пользователя '
+            'ограничивается и отклоняется без запросов в базу'
+        )
+        assert 'Retry-After' in response
+        data['username'] = 'Victim'
+        assert client.post(URL_TOKEN, data=data).status_code == 429
+        data['username'] = 'other'
+        assert client.post(URL_TOKEN, data=data).status_code == 404, (
+            'Проверьте, что ограничение по имени не затрагивает других '
+            'пользователей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_signup_per_ip(self):
+        capacity, _ = throttling.parse_rate(
+            throttling.TokenBucketThrottle.rates['signup_ip']
+        )
+        client = APIClient(REMOTE_ADDR='10.0.0.1')
+        for number in range(capacity):
+            response = client.post(URL_SIGNUP, data={'username': number})
+            assert response.status_code == 400
+        response = client.post(URL_SIGNUP, data={'username': 'last'})
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничивается по IP-адресу'
+        )
+        response = APIClient(REMOTE_ADDR='10.0.0.2').post(
+            URL_SIGNUP, data={'username': 'last'}
+        )
+        assert response.status_code == 400
+
+    def test_03_shared_between_processes(self, monkeypatch):
+        monkeypatch.setattr(throttling, 'THROTTLE_FLUSH_INTERVAL', 3600)
+        first, second = throttling.BucketStore(), throttling.BucketStore()
+        first.cache().clear()
+        for _ in range(3):
+            assert first.take('throttle:test', 5, 0.001)[0]
+        first.flush()
+        assert second.take('throttle:test', 5, 0.001)[0]
+        assert second.take('throttle:test', 5, 0.001)[0]
+        allowed, wait = second.take('throttle:test', 5, 0.001)
+        assert not allowed and wait > 0, (
+            'Проверьте, что расход токенов одного процесса виден другим '
+            'после сброса в общее хранилище'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_list_body(self):
+        client = APIClient(REMOTE_ADDR='10.0.0.3')
+        for url in (URL_SIGNUP, URL_TOKEN):
+            response = client.post(url, data=[1, 2], format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что `{url}` отвечает 400 на тело-список'
+            )
+
+    def test_05_many_buckets_kept(self, monkeypatch):
+        monkeypatch.setattr(throttling, 'THROTTLE_FLUSH_INTERVAL', 3600)
+        first, second = throttling.BucketStore(), throttling.BucketStore()
+        keys = [f'throttle:test:{number}' for number in range(1000)]
+        for key in keys:
+            assert first.take(key, 1, 0.001)[0]
+        first.flush()
+        allowed = [key for key in keys if second.take(key, 1, 0.001)[0]]
+        assert not allowed, (
+            'Проверьте, что общее хранилище не теряет корзины, когда их '
+            'больше 300: потерянная корзина возвращается полной'
+        )
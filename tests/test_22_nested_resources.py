@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_comments
+
+
+def count_queries(client, url, method='get', **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+class Test22NestedResources:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_queries_do_not_grow(self, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        full_title, single_title = titles[0]['id'], titles[1]['id']
+        admin_client.post(
+            f'/api/v1/titles/{single_title}/reviews/',
+            data={'text': 'Один отзыв', 'score': 5}
+        )
+        _, full = count_queries(
+            admin_client, f'/api/v1/titles/{full_title}/reviews/'
+        )
+        _, single = count_queries(
+            admin_client, f'/api/v1/titles/{single_title}/reviews/'
+        )
+        assert len(full) == len(single), (
+            'Проверьте, что авторы отзывов загружаются вместе с отзывами, '
+            'а не отдельным запросом на каждый'
+        )
+        base = f'/api/v1/titles/{full_title}/reviews/'
+        admin_client.post(
+            f'{base}{reviews[1]["id"]}/comments/', data={'text': 'Один'}
+        )
+        _, full = count_queries(
+            admin_client, f'{base}{reviews[0]["id"]}/comments/'
+        )
+        _, single = count_queries(
+            admin_client, f'{base}{reviews[1]["id"]}/comments/'
+        )
+        assert len(full) == len(single), (
+            'Проверьте, что авторы комментариев загружаются вместе с '
+            'комментариями'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_parent_fetched_once(self, admin_client, admin):
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        client = auth_client(user)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response, queries = count_queries(
+            client, url, 'post', data={'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 201
+        title_selects = [
+            sql for sql in queries
+            if sql.startswith('SELECT') and 'FROM "reviews_title"' in sql
+        ]
+        assert len(title_selects) == 1, (
+            'Проверьте, что при создании отзыва произведение читается из '
+            'базы один раз'
+        )
+
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        response, queries = count_queries(
+            client, url, 'post', data={'text': 'Комментарий'}
+        )
+        assert response.status_code == 201
+        review_selects = [
+            sql for sql in queries
+            if sql.startswith('SELECT') and 'FROM "reviews_review"' in sql
+        ]
+        assert len(review_selects) == 1, (
+            'Проверьте, что при создании комментария отзыв читается из '
+            'базы один раз'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_must_belong_to_title(self, admin_client, admin):
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        assert admin_client.get(url).status_code == 404, (
+            'Проверьте, что комментарии отзыва к другому произведению '
+            'не отдаются'
+        )
+        response = auth_client(user).post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 404, (
+            'Проверьте, что нельзя прокомментировать отзыв по адресу '
+            'чужого произведения'
+        )
@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connections
+
+from api.v1.serializers import REVIEW_ERROR
+from api.v1.views import ReviewViewSet
+from reviews.models import Review, Title
+from .common import auth_client, create_titles, create_users_api
+
+THREADS = 6
+
+
+class Test23UniqueReview:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_duplicate_review(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        client = auth_client(user)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 8}
+        assert client.post(url, data=data).status_code == 201
+
+        response = client.post(url, data=data)
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': [REVIEW_ERROR]}, (
+            'Проверьте, что повторный отзыв отклоняется с прежней ошибкой'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_count, title.rating_sum) == (1, 8), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_parallel_posts(self, admin_client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        validated = threading.Barrier(THREADS, timeout=10)
+        write_lock = threading.Lock()
+        perform_create = ReviewViewSet.perform_create
+
+        def racing_perform_create(view, serializer):
+            # Все запросы прошли валидацию до того, как первый из них
+            # записал отзыв. Записи идут по очереди только потому, что
+            # тестовая in-memory база SQLite не ждёт чужих блокировок.
+            validated.wait()
+            with write_lock:
+                perform_create(view, serializer)
+
+        monkeypatch.setattr(
+            ReviewViewSet, 'perform_create', racing_perform_create
+        )
+
+        def post(score):
+            try:
+                return auth_client(user).post(
+                    url, data={'text': 'Отзыв', 'score': score}
+                )
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            responses = list(executor.map(post, range(1, THREADS + 1)))
+
+        codes = sorted(response.status_code for response in responses)
+        assert codes == [201] + [400] * (THREADS - 1), (
+            'Проверьте, что из одновременных отзывов одного пользователя '
+            'создаётся ровно один, а остальные получают 400'
+        )
+        assert Review.objects.filter(author=user).count() == 1
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.rating_count == 1
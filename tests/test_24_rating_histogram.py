@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from .common import auth_client, create_reviews
+
+
+def histogram(**counts):
+    result = {str(score): 0 for score in range(1, 11)}
+    result.update({score[1:]: count for score, count in counts.items()})
+    return result
+
+
+class Test24RatingHistogram:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_histogram(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        data = client.get(url).json()
+        assert data['rating_histogram'] == histogram(_3=1, _4=1, _5=1), (
+            'Проверьте, что страница произведения содержит распределение '
+            'оценок `rating_histogram`'
+        )
+        listed = client.get('/api/v1/titles/').json()['results']
+        assert all('rating_histogram' not in title for title in listed)
+
+        auth_client(user).patch(
+            f'{url}reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        assert client.get(url).json()['rating_histogram'] == histogram(
+            _4=1, _5=1, _10=1
+        ), 'Проверьте, что изменение оценки обновляет гистограмму'
+
+        admin_client.delete(f'{url}reviews/{reviews[0]["id"]}/')
+        assert client.get(url).json()['rating_histogram'] == histogram(
+            _4=1, _10=1
+        ), 'Проверьте, что удаление отзыва обновляет гистограмму'
+
+        data = client.get(f'{url}?fields=rating_histogram').json()
+        assert data == {'rating_histogram': histogram(_4=1, _10=1)}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_command(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(score_3=7, score_9=2)
+        call_command('recount_ratings')
+        data = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert data['rating_histogram'] == histogram(_3=1, _4=1, _5=1), (
+            'Проверьте, что recount_ratings пересобирает гистограммы'
+        )
+        data = client.get(f'/api/v1/titles/{titles[1]["id"]}/').json()
+        assert data['rating_histogram'] == histogram()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stale_save_keeps_counters(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[1]['id'])
+        admin_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Отзыв', 'score': 7}
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{title.pk}/', data={'genre': ['horror']}
+        )
+        title.name = 'Новое название'
+        title.save()
+        title.refresh_from_db()
+        assert title.name == 'Новое название'
+        assert (title.rating_count, title.score_7) == (1, 1), (
+            'Проверьте, что сохранение устаревшего произведения не '
+            'затирает счётчики отзывов'
+        )
+        assert title.genre_mask != 0, (
+            'Проверьте, что сохранение устаревшего произведения не '
+            'затирает маску жанров'
+        )
@@ -0,0 +1,75 @@
+import pytest
+from django.core.management import call_command
+
+from api.v1.views import TOP_BOARD_ERROR
+from reviews.models import LeaderboardEntry, Review
+from .common import create_reviews
+
+URL = '/api/v1/titles/top/'
+
+
+def top_ids(client, query=''):
+    response = client.get(f'{URL}{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что `{URL}{query}` возвращает 200'
+    )
+    return [title['id'] for title in response.json()]
+
+
+class Test25Leaderboards:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        # Один отзыв на 10 против трёх на 3, 4 и 5: байесовская оценка
+        # (5.5 * 5 + 10) / 6 = 6.25 выше (5.5 * 5 + 12) / 8 = 4.94.
+        admin_client.post(
+            f'/api/v1/titles/{second}/reviews/',
+            data={'text': 'Шедевр', 'score': 10}
+        )
+        assert top_ids(client) == [second, first], (
+            'Проверьте, что общий рейтинг упорядочен по байесовской оценке'
+        )
+        data = client.get(URL).json()[0]
+        assert data['rating'] == 10 and data['category']['slug'] == 'books'
+        assert top_ids(client, '?limit=1') == [second]
+        assert top_ids(client, '?genre=horror') == [first], (
+            'Проверьте, что рейтинг по жанру содержит только его произведения'
+        )
+        assert top_ids(client, '?category=books') == [second], (
+            'Проверьте, что рейтинг по категории содержит только её '
+            'произведения'
+        )
+        assert top_ids(client, '?genre=unknown') == []
+
+        response = client.get(f'{URL}?genre=horror&category=books')
+        assert response.status_code == 400
+        assert response.json() == {'detail': TOP_BOARD_ERROR}
+        assert client.get(f'{URL}?limit=0').status_code == 400
+        assert client.get(f'{URL}?limit=abc').status_code == 400
+
+        admin_client.patch(
+            f'/api/v1/titles/{second}/', data={'genre': ['horror']}
+        )
+        assert top_ids(client, '?genre=horror') == [second, first], (
+            'Проверьте, что смена жанров обновляет рейтинги жанров'
+        )
+        assert top_ids(client, '?genre=drama') == []
+
+        Review.objects.filter(title_id=first).delete()
+        assert top_ids(client) == [second], (
+            'Проверьте, что произведение без отзывов покидает рейтинги'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_refresh_command(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        expected = top_ids(client, '?genre=comedy')
+        LeaderboardEntry.objects.all().delete()
+        call_command('refresh_leaderboards')
+        assert expected == [titles[0]['id']]
+        assert top_ids(client, '?genre=comedy') == expected, (
+            'Проверьте, что refresh_leaderboards пересобирает рейтинги'
+        )
+        assert LeaderboardEntry.objects.count() == 4
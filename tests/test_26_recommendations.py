@@ -0,0 +1,135 @@
+import math
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from reviews.models import Category, Review, Title, TitleNeighbor
+from reviews.recommendations import RatingMatrix, recommended_title_ids
+from .common import auth_client
+
+# Первые два произведения нравятся одним и тем же пользователям,
+# третье - тем, кому первые два не нравятся.
+SCORES = {
+    'first': (9, 9, 2),
+    'second': (8, 9, 3),
+    'third': (2, 3, 9),
+}
+
+
+def create_ratings():
+    category = Category.objects.create(name='Фильм', slug='films')
+    titles = [
+        Title.objects.create(name=name, year=2000, category=category)
+        for name in ('Один', 'Два', 'Три')
+    ]
+    users = {
+        username: get_user_model().objects.create(
+            username=username, email=f'{username}@yamdb.fake'
+        )
+        for username in SCORES
+    }
+    for username, scores in SCORES.items():
+        for title, score in zip(titles, scores):
+            Review.objects.create(
+                author=users[username], title=title, text='Отзыв',
+                score=score
+            )
+    return titles
+
+
+class Test26Recommendations:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_similar(self, client):
+        first, second, third = create_ratings()
+        call_command('build_recommendations', block_size=2)
+        response = client.get(f'/api/v1/titles/{first.pk}/similar/')
+        assert response.status_code == 200
+        assert [title['id'] for title in response.json()] == [second.pk], (
+            'Проверьте, что похожими считаются произведения, которые '
+            'нравятся одним и тем же пользователям'
+        )
+        assert response.json()[0]['name'] == second.name
+        response = client.get(f'/api/v1/titles/{third.pk}/similar/')
+        assert response.json() == [], (
+            'Проверьте, что соседи с отрицательным сходством не хранятся'
+        )
+        assert client.get('/api/v1/titles/0/similar/').status_code == 404
+        assert TitleNeighbor.objects.count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recommendations(self, client, django_assert_num_queries):
+        first, second, third = create_ratings()
+        call_command('build_recommendations')
+        user = get_user_model().objects.create(
+            username='newcomer', email='newcomer@yamdb.fake'
+        )
+        url = '/api/v1/users/me/recommendations/'
+        assert client.get(url).status_code == 401
+        response = auth_client(user).get(url)
+        assert response.status_code == 200
+        assert response.json() == [], (
+            'Проверьте, что без отзывов рекомендаций нет'
+        )
+        for title, score in ((first, 10), (third, 1)):
+            Review.objects.create(
+                author=user, title=title, text='Отзыв', score=score
+            )
+        response = auth_client(user).get(url)
+        assert [title['id'] for title in response.json()] == [second.pk], (
+            'Проверьте, что рекомендуются непросмотренные произведения, '
+            'похожие на понравившиеся'
+        )
+        with django_assert_num_queries(2):
+            recommended_title_ids(user, 10)
+
+    def test_03_matrix_matches_dense(self):
+        ratings = [
+            [(1, 9), (2, 8), (3, 2), (4, 5)],
+            [(1, 7), (3, 3), (4, 9)],
+            [(2, 10), (3, 1)],
+            [(1, 5), (2, 5)],
+            [(4, 6), (2, 2), (1, 8)],
+        ]
+        centered = []
+        for row in ratings:
+            mean = sum(score for _, score in row) / len(row)
+            centered.append({title: score - mean for title, score in row})
+
+        def column(title):
+            return [row.get(title, 0) for row in centered]
+
+        def cosine(first, second):
+            first, second = column(first), column(second)
+            dot = sum(a * b for a, b in zip(first, second))
+            norm = math.sqrt(sum(a * a for a in first)) * math.sqrt(
+                sum(b * b for b in second)
+            )
+            return dot / norm
+
+        matrix = RatingMatrix(ratings)
+        for title in (1, 2, 3, 4):
+            expected = sorted(
+                (
+                    (cosine(title, other), other)
+                    for other in (1, 2, 3, 4) if other != title
+                ),
+                reverse=True
+            )
+            expected = [pair for pair in expected if pair[0] > 0][:2]
+            result = [
+                (similarity, matrix.title_ids[other])
+                for similarity, other in matrix.neighbors(
+                    matrix.columns[title], 2
+                )
+            ]
+            assert [other for _, other in result] == [
+                other for _, other in expected
+            ] and all(
+                math.isclose(got, want, rel_tol=1e-5)
+                for (got, _), (want, _) in zip(result, expected)
+            ), (
+                'Проверьте, что разреженный расчёт сходства совпадает с '
+                'прямым подсчётом косинусов'
+            )
@@ -0,0 +1,97 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.catalog_cache import related_index
+from reviews.models import Genre, Title
+from .common import create_titles
+
+
+def related_ids(client, title_id):
+    response = client.get(f'/api/v1/titles/{title_id}/related/')
+    assert response.status_code == 200, (
+        f'Проверьте, что `/api/v1/titles/{title_id}/related/` возвращает 200'
+    )
+    return [title['id'] for title in response.json()]
+
+
+def create_title(admin_client, name, genres, category):
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': name, 'year': 2000, 'genre': genres, 'category': category,
+        'description': 'Описание'
+    })
+    return response.json()['id']
+
+
+class Test27RelatedTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_related(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        same_genres = create_title(
+            admin_client, 'Те же жанры', ['horror', 'comedy'], 'books'
+        )
+        one_genre = create_title(
+            admin_client, 'Один жанр из трёх', ['horror', 'drama'], 'films'
+        )
+        same_category = create_title(
+            admin_client, 'Та же категория', ['drama'], 'films'
+        )
+        assert related_ids(client, first) == [
+            same_genres, one_genre, same_category
+        ], (
+            'Проверьте, что похожие произведения упорядочены по сходству '
+            'жанров с учётом общей категории'
+        )
+        response = client.get(f'/api/v1/titles/{first}/related/?limit=1')
+        assert [title['id'] for title in response.json()] == [same_genres]
+        assert client.get('/api/v1/titles/0/related/').status_code == 404
+
+        admin_client.patch(
+            f'/api/v1/titles/{second}/', data={'genre': ['horror', 'comedy']}
+        )
+        assert related_ids(client, first)[:2] == [second, same_genres], (
+            'Проверьте, что смена жанров обновляет похожие произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_reused(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        related_ids(admin_client, titles[0]['id'])
+        with CaptureQueriesContext(connection) as context:
+            related_ids(admin_client, titles[1]['id'])
+        assert not [
+            query for query in context.captured_queries
+            if '"reviews_title_genre"' in query['sql']
+            and 'INNER JOIN' not in query['sql']
+        ], 'Проверьте, что индекс жанров не перечитывается на каждый запрос'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_catalog_cache_interface(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        genre_ids = sorted(set(Title.genre.through.objects.values_list(
+            'genre_id', flat=True
+        )))
+        mask = sum(
+            1 << genre_ids.index(genre.pk) for genre in title.genre.all()
+        )
+        assert related_index.get(title.pk) == (mask, title.category_id), (
+            'Проверьте, что индекс похожих произведений поддерживает get() '
+            'базового CatalogCache'
+        )
+        assert len(related_index.all()) == Title.objects.count()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_large_genre_ids(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        genre = Genre.objects.create(pk=2_000_000, name='Новый', slug='new')
+        for title in titles:
+            Title.objects.get(pk=title['id']).genre.add(genre)
+        assert related_ids(client, titles[0]['id'])[0] == titles[1]['id']
+        assert max(
+            related_index.get(title['id'])[0].bit_length() for title in titles
+        ) <= Genre.objects.count(), (
+            'Проверьте, что маски жанров индекса не растут вместе с id жанров'
+        )
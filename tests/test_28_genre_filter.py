@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import genre_masks
+from reviews.catalog_cache import genre_cache
+from reviews.models import Genre
+from .common import create_titles
+
+
+def filtered_ids(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что `/api/v1/titles/?{query}` возвращает 200'
+    )
+    data = response.json()
+    ids = [title['id'] for title in data['results']]
+    assert data['count'] == len(ids) == len(set(ids)), (
+        'Проверьте, что фильтр по жанрам не дублирует произведения'
+    )
+    return sorted(ids)
+
+
+class Test28GenreFilter:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_modes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Страшная драма', 'year': 2010,
+            'genre': ['horror', 'drama'], 'category': 'films',
+            'description': 'Описание'
+        }).json()['id']
+
+        assert filtered_ids(client, 'genre=horror') == [first, third]
+        assert filtered_ids(client, 'genre=horror,drama') == [third], (
+            'Проверьте, что по умолчанию нужны все перечисленные жанры'
+        )
+        assert filtered_ids(
+            client, 'genre=horror,drama&genre_mode=any'
+        ) == [first, second, third], (
+            'Проверьте, что genre_mode=any подбирает произведения хотя бы '
+            'с одним из жанров'
+        )
+        assert filtered_ids(client, 'genre=horror,unknown') == []
+        assert filtered_ids(
+            client, 'genre=horror,unknown&genre_mode=any'
+        ) == [first, third]
+        assert filtered_ids(client, 'genre=hor') == [], (
+            'Проверьте, что жанр сравнивается со slug целиком'
+        )
+        response = client.get('/api/v1/titles/?genre=horror&genre_mode=x')
+        assert response.status_code == 400
+
+        admin_client.patch(
+            f'/api/v1/titles/{second}/', data={'genre': ['comedy']}
+        )
+        assert filtered_ids(client, 'genre=comedy') == [first, second], (
+            'Проверьте, что смена жанров произведения обновляет фильтр'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genre_bits(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first = titles[0]['id']
+        assert admin_client.delete('/api/v1/genres/horror/').status_code == 204
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Триллер', 'slug': 'thriller'}
+        )
+        assert Genre.objects.get(slug='thriller').mask_bit == 0
+        assert filtered_ids(client, 'genre=thriller') == [], (
+            'Проверьте, что бит удалённого жанра снимается с произведений'
+        )
+
+        # Жанр без бита (их больше 63) подбирается через таблицу связей.
+        Genre.objects.filter(slug='comedy').update(mask_bit=None)
+        genre_masks.refresh_masks()
+        genre_cache.invalidate()
+        assert filtered_ids(client, 'genre=comedy') == [first]
+        assert filtered_ids(
+            client, 'genre=comedy,drama&genre_mode=any'
+        ) == sorted([first, titles[1]['id']])
+        assert filtered_ids(client, 'genre=comedy,drama') == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_refresh_writes_changed_only(self, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            genre_masks.refresh_masks()
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ], 'Проверьте, что неизменённые маски жанров не перезаписываются'
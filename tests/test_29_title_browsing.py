@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+def page(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что `/api/v1/titles/?{query}` возвращает 200'
+    )
+    return [title['id'] for title in response.json()['results']]
+
+
+def page_plan(client, query):
+    """План запроса строк страницы (с LIMIT) в SQLite."""
+    with CaptureQueriesContext(connection) as context:
+        page(client, query)
+    sql = next(
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_title"' in query['sql'] and 'LIMIT' in query['sql']
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+class Test29TitleBrowsing:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_filters_and_ordering(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        old = admin_client.post('/api/v1/titles/', data={
+            'name': 'Старый', 'year': 1990, 'genre': ['drama'],
+            'category': 'films', 'description': 'Описание'
+        }).json()['id']
+
+        assert page(client, '') == [second, first, old], (
+            'Проверьте, что по умолчанию произведения упорядочены от новых '
+            'к старым'
+        )
+        assert page(client, 'ordering=year') == [old, first, second]
+        assert client.get('/api/v1/titles/?ordering=name').status_code == 400
+        assert page(client, 'year_min=1995&year_max=2010') == [first], (
+            'Проверьте фильтры `year_min` и `year_max`'
+        )
+        assert page(client, 'category=films') == [first, old]
+        assert page(client, 'category=film') == [], (
+            'Проверьте, что категория сравнивается со slug целиком'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_plans_use_indexes(self, client, admin_client):
+        create_titles(admin_client)
+        for query, index in (
+            ('', 'title_year_idx'),
+            ('year_min=2000&year_max=2010', 'title_year_idx'),
+            ('category=films', 'title_category_idx'),
+            ('category=films&year_min=2000&ordering=year',
+             'title_category_idx'),
+        ):
+            plan = page_plan(client, query)
+            assert index in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что страница `?{query}` читается по индексу '
+                f'{index} без сортировки: {plan}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unlisted_fields_ignored(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        ids = page(client, '')
+        for query in ('rating_count=4', 'score_5=1', 'genre_mask=0',
+                      f'name_search={titles[0]["name"]}', 'description=x'):
+            assert page(client, query) == ids, (
+                f'Проверьте, что `?{query}` не является фильтром списка '
+                'произведений'
+            )
+        assert page(client, 'year=2000') == page(
+            client, 'year_min=2000&year_max=2000'
+        )
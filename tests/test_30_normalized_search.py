@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre
+from reviews.search import normalize_search_text, refresh_search_columns
+from .common import create_titles, create_users_api
+
+
+def found(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что `{url}` возвращает 200'
+    )
+    return response.json()['results']
+
+
+class Test30NormalizedSearch:
+
+    def test_01_normalize(self):
+        assert normalize_search_text('  Ёлка\t\nЗИМНЯЯ ') == 'елка зимняя'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_catalog_and_titles(self, admin_client):
+        create_titles(admin_client)
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Ёлочные', 'slug': 'xmas'}
+        )
+        results = found(admin_client, '/api/v1/genres/?search=ДРАМА')
+        assert [genre['slug'] for genre in results] == ['drama'], (
+            'Проверьте, что поиск жанров не учитывает регистр кириллицы'
+        )
+        assert 'name_search' not in results[0]
+        results = found(admin_client, '/api/v1/categories/?search=елоч')
+        assert [category['slug'] for category in results] == ['xmas'], (
+            'Проверьте, что поиск категорий не различает `е` и `ё`'
+        )
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Ёлка  Зимняя', 'year': 2001, 'genre': ['drama'],
+            'category': 'xmas', 'description': 'Описание'
+        })
+        results = found(admin_client, '/api/v1/titles/?name=ЕЛКА ЗИМ')
+        assert [title['name'] for title in results] == ['Ёлка  Зимняя'], (
+            'Проверьте, что фильтр `name` нормализует регистр, `ё` и пробелы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_users(self, admin_client):
+        create_users_api(admin_client)
+        url = '/api/v1/users/?search=STMOD'
+        assert [user['username'] for user in found(admin_client, url)] == [
+            'TestModer'
+        ], 'Проверьте, что поиск пользователей идёт по вхождению в имя'
+        url = '/api/v1/users/?username_prefix=TESTM'
+        assert [user['username'] for user in found(admin_client, url)] == [
+            'TestModer'
+        ], 'Проверьте фильтр пользователей по началу имени'
+        assert found(admin_client, '/api/v1/users/?username_prefix=stm') == []
+        with CaptureQueriesContext(connection) as context:
+            found(admin_client, url)
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'LIMIT' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        assert 'username_search' in plan and 'SCAN' not in plan, (
+            f'Проверьте, что фильтр по началу имени читает индекс: {plan}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_rows(self):
+        Genre.objects.bulk_create([
+            Genre(name='Научная  Фантастика', slug='sf')
+        ])
+        refresh_search_columns()
+        assert Genre.objects.get(slug='sf').name_search == (
+            'научная фантастика'
+        ), 'Проверьте, что refresh_search_columns заполняет теневые колонки'
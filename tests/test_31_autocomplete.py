@@ -0,0 +1,142 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import catalog_cache
+from reviews.catalog_cache import title_autocomplete
+from reviews.models import Category, Review, Title
+from .common import create_reviews, create_titles
+
+URL = '/api/v1/titles/autocomplete/'
+
+
+def names(client, query):
+    response = client.get(f'{URL}?{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что `{URL}?{query}` возвращает 200'
+    )
+    return [title['name'] for title in response.json()]
+
+
+class Test31Autocomplete:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_autocomplete(self, client, admin_client, admin):
+        _, titles, user, moderator = create_reviews(admin_client, admin)
+        new_id = admin_client.post('/api/v1/titles/', data={
+            'name': 'Поворот', 'year': 2021, 'genre': ['drama'],
+            'category': 'films', 'description': 'Описание'
+        }).json()['id']
+
+        assert names(client, 'q=ПОВ') == ['Поворот туда', 'Поворот'], (
+            'Проверьте, что подсказки упорядочены по числу отзывов'
+        )
+        data = client.get(f'{URL}?q=туда').json()
+        assert data == [{
+            'id': titles[0]['id'], 'name': 'Поворот туда', 'year': 2000
+        }], 'Проверьте, что подсказки ищутся по началу любого слова'
+        assert names(client, 'q=ворот') == []
+        assert names(client, 'q=') == []
+        assert names(client, 'q=пов&limit=1') == ['Поворот туда']
+        assert client.get(f'{URL}?q=пов&limit=0').status_code == 400
+
+        title = Title.objects.get(pk=new_id)
+        for author in (admin, user, moderator):
+            Review.objects.create(
+                author=author, title=title, text='Отзыв', score=5
+            )
+        assert names(client, 'q=пов') == ['Поворот', 'Поворот туда'], (
+            'Проверьте, что новые отзывы меняют порядок подсказок'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Повесть'}
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert names(client, 'q=пов') == [
+                'Поворот', 'Поворот туда', 'Повесть'
+            ], 'Проверьте, что изменение названия попадает в подсказки'
+            assert names(client, 'q=проект') == []
+        assert not context.captured_queries, (
+            'Проверьте, что подсказки отдаются из памяти без запросов к базе'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{new_id}/')
+        assert names(client, 'q=пов') == ['Поворот туда', 'Повесть'], (
+            'Проверьте, что удалённое произведение пропадает из подсказок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_short_prefix_lists(self, client, admin_client, admin,
+                                   monkeypatch):
+        _, titles, user, moderator = create_reviews(admin_client, admin)
+        # Списки по одной подсказке с запасом в две: выбывания быстро
+        # исчерпывают запас.
+        monkeypatch.setattr(catalog_cache, 'AUTOCOMPLETE_TOP_SIZE', 1)
+        monkeypatch.setattr(catalog_cache, 'AUTOCOMPLETE_TOP_RESERVE', 2)
+        category = Category.objects.first()
+        created = {
+            name: Title.objects.create(
+                name=name, year=2000, category=category, description='-'
+            ).pk
+            for name in ('Пара', 'Пуск', 'Пик', 'Перо')
+        }
+        title_autocomplete.invalidate()
+
+        def first(query):
+            result = names(client, f'q={query}&limit=1')
+            expected = title_autocomplete.suggestions(
+                title_autocomplete.items(), title_autocomplete.ranked(
+                    title_autocomplete.items(), query, 1
+                )
+            )
+            assert result == [title['name'] for title in expected], (
+                'Проверьте, что готовые списки коротких префиксов совпадают '
+                'с ранжированием всех подходящих названий'
+            )
+            return result
+
+        assert first('п') == ['Поворот туда']
+        for author in (admin, user, moderator):
+            Review.objects.create(
+                author=author, title_id=created['Пик'], text='Отзыв', score=5
+            )
+        assert first('п') == first('пи') == ['Пик'], (
+            'Проверьте, что новые отзывы поднимают подсказку коротких '
+            'префиксов'
+        )
+        admin_client.delete(f'/api/v1/titles/{created["Пик"]}/')
+        assert first('п') == ['Поворот туда']
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert first('п') == ['Пара'], (
+            'Проверьте, что список префикса, растерявший запас, набирается '
+            'заново'
+        )
+        assert first('по') == []
+        assert names(client, 'q=п&limit=10') == [
+            'Пара', 'Перо', 'Проект', 'Пуск'
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_background_reload(self, client, admin_client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        assert names(client, 'q=проект') == ['Проект']
+        # Другой процесс переименовал произведение и сдвинул метку версии.
+        Title.objects.filter(pk=titles[1]['id']).update(
+            name='Прожект', name_search='прожект'
+        )
+        title_autocomplete.shared.set(
+            title_autocomplete.version_key, 'other', None
+        )
+        monkeypatch.setattr(catalog_cache, 'AUTOCOMPLETE_RELOAD_INTERVAL', 0)
+        title_autocomplete._checked_at = 0.0
+        deadline = time.monotonic() + 5
+        while names(client, 'q=прожект') != ['Прожект']:
+            assert time.monotonic() < deadline, (
+                'Проверьте, что индекс подсказок перечитывается после смены '
+                'общей метки версии'
+            )
+            time.sleep(0.05)
+        assert names(client, 'q=проект') == []